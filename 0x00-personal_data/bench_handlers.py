@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Measure records/sec of the user_data logger with 1, 3 and 10
+handlers, with the formatter of the first version that redacts
+record.msg again in every handler and with RedactingFormatter
+Usage: ./bench_handlers.py [records] [handlers ...]
+"""
+from filtered_logger import PII_FIELDS, RedactingFormatter, filter_datum
+import io
+import logging
+import sys
+import time
+
+MESSAGE = ("name=Bob;email=bob@dylan.com;phone=555-1234;ssn=123-45-6789;"
+           "password=b4l0u;ip=60ed:c396:2ff:244:bbd0:9208:26f2:93ea;"
+           "last_login=2019-11-14 06:14:24;user_agent=Mozilla/5.0;")
+
+
+class MsgRedactingFormatter(logging.Formatter):
+    """Formatter of the first version: record.msg is redacted in
+    place by every handler"""
+
+    REDACTION = RedactingFormatter.REDACTION
+    SEPARATOR = RedactingFormatter.SEPARATOR
+
+    def __init__(self, fields: list):
+        """Initialize the class"""
+        super().__init__(RedactingFormatter.FORMAT)
+        self.fields = fields
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Redact record.msg then format the record"""
+        record.msg = filter_datum(self.fields, self.REDACTION,
+                                  record.msg, self.SEPARATOR)
+        return super().format(record)
+
+
+def records_per_second(formatter_class, handlers: int,
+                       records: int) -> float:
+    """Records/sec of the user_data logger with @handlers stream
+    handlers writing to memory, each with its own @formatter_class"""
+    logger = logging.getLogger('user_data')
+    logger.handlers = []
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for _ in range(handlers):
+        handler = logging.StreamHandler(io.StringIO())
+        handler.setFormatter(formatter_class(PII_FIELDS))
+        logger.addHandler(handler)
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.info(MESSAGE)
+    return records / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sizes = [int(n) for n in sys.argv[2:]] or [1, 3, 10]
+    for handlers in sizes:
+        before = records_per_second(MsgRedactingFormatter, handlers, records)
+        after = records_per_second(RedactingFormatter, handlers, records)
+        print("{} handler(s): per handler {:.0f} records/s, once per "
+              "record {:.0f} records/s ({:.1f}x)".format(
+                  handlers, before, after, after / before))
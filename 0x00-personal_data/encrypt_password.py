@@ -1,12 +1,45 @@
 #!/usr/bin/env python3
 """hash and decrypt passwords"""
+import functools
+import os
+import time
 import bcrypt
 
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
 
-def hash_password(password: str) -> bytes:
+
+def calibrate_rounds(target_ms: float = 50) -> int:
+    """Find the highest bcrypt work factor whose hash
+    takes at most @target_ms milliseconds on this machine"""
+    pd = b'calibration password'
+    start = time.perf_counter()
+    bcrypt.hashpw(pd, bcrypt.gensalt(MIN_ROUNDS))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    rounds = MIN_ROUNDS
+    # every extra round doubles the cost of a hash
+    while rounds < MAX_ROUNDS and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+@functools.lru_cache(maxsize=None)
+def work_factor() -> int:
+    """Work factor used for new hashes: BCRYPT_ROUNDS if set,
+    otherwise calibrated once to BCRYPT_TARGET_MS (default 50ms)"""
+    rounds = os.getenv('BCRYPT_ROUNDS')
+    if rounds is not None:
+        return min(max(int(rounds), MIN_ROUNDS), MAX_ROUNDS)
+    return calibrate_rounds(float(os.getenv('BCRYPT_TARGET_MS', '50')))
+
+
+def hash_password(password: str, rounds: int = None) -> bytes:
     """Hash a password"""
+    if rounds is None:
+        rounds = work_factor()
     hash_pd = bcrypt.hashpw(bytes(password, encoding='utf-8'),
-                            bcrypt.gensalt())
+                            bcrypt.gensalt(rounds))
     return hash_pd
 
 
@@ -16,3 +49,21 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
     if bcrypt.checkpw(pd, hashed_password):
         return True
     return False
+
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """Get the work factor stored in a bcrypt hash
+    e.g. 12 for b'$2b$12$...'"""
+    return int(hashed_password.split(b'$')[2])
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """Check if a hash was made with a lower work factor than
+    the current one, so it can be upgraded after a valid login:
+    when is_valid(stored, pd) and needs_rehash(stored), store
+    hash_password(pd) in place of stored
+    >>> stored = hash_password('pd', rounds=MIN_ROUNDS)
+    >>> is_valid(stored, 'pd'), hash_rounds(stored)
+    (True, 4)
+    """
+    return hash_rounds(hashed_password) < work_factor()
@@ -1,15 +1,41 @@
 #!/usr/bin/env python3
 """obfuscate a log message so as to
 remove personal information form log messages"""
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import copy
+import functools
+import json
 import logging
+import logging.handlers
+import mmap
+import queue
 import re
-from typing import List
+import resource
+import threading
+import time
+from typing import Callable, IO, Iterable, Iterator, List, Pattern, Tuple
 import mysql.connector
 import os
+from os import path
 
 PII_FIELDS = ('name', 'email', 'phone', 'ssn', 'password')
 
 
+@functools.lru_cache(maxsize=128)
+def _redaction_pattern(fields: Tuple[str, ...],
+                       separator: str) -> Pattern:
+    """Compile @fields into a single alternation matching
+    `field=value` up to the next @separator.
+    The pattern is cached per (fields, separator) pair"""
+    alts = '|'.join(re.escape(field) for field in fields)
+    if len(separator) == 1:
+        value = '[^{}\\n]*'.format(re.escape(separator))
+    else:
+        value = '(?:(?!{}).)*'.format(re.escape(separator))
+    return re.compile('((?:{})=){}'.format(alts, value))
+
+
 def filter_datum(fields: List[str], redaction: str,
                  message: str, separator: str) -> str:
     """Obfuscate @fields in a @message with
@@ -18,19 +44,123 @@ def filter_datum(fields: List[str], redaction: str,
     >>> message = "name=egg;email=eggmin@eggsample.com;password=eggcellent;"
     >>> redaction = 'xxx'
     >>> filter_datum(fields, redaction, message, ';')
-    >>> 'name=xxx;email=eggmin@eggsample.com;password=xxx;;'
+    'name=xxx;email=eggmin@eggsample.com;password=xxx;'
     """
-    for field in fields:
-        msg_comp = message.split(separator)
-        msg_comp = [re.sub(f'({field}=).*',
-                           rf'\1{redaction}', msg) for msg in msg_comp]
-        message = separator.join(msg_comp)
-    return message
+    if not fields:
+        return message
+    pattern = _redaction_pattern(tuple(fields), separator)
+    return pattern.sub(lambda m: m.group(1) + redaction, message)
+
+
+def _redact_span(file_path: str, start: int, end: int,
+                 fields: Tuple[str, ...], redaction: str,
+                 separator: str) -> bytes:
+    """Redact the bytes [@start, @end) of the file at @file_path.
+    Runs in a worker process"""
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8')
+    return filter_datum(fields, redaction, text, separator).encode('utf-8')
 
 
-def get_logger() -> logging.Logger:
+def _redact_batch(lines: List[str], fields: Tuple[str, ...],
+                  redaction: str, separator: str) -> List[str]:
+    """Redact a batch of lines. Runs in a worker process"""
+    return [filter_datum(fields, redaction, line, separator)
+            for line in lines]
+
+
+def redact_file(file_path: str, out: IO[bytes],
+                fields: Iterable[str] = PII_FIELDS,
+                redaction: str = '***', separator: str = ';',
+                workers: int = None,
+                chunk_size: int = 8 * 1024 * 1024) -> int:
+    """Redact a (possibly multi-GB) log file into @out using
+    a process pool. The file is memory-mapped and split into
+    chunks of about @chunk_size bytes ending on a newline,
+    each worker maps and redacts its own chunk and the results
+    are written to @out in the original order. Only a few chunks
+    per worker are in flight so memory stays bounded.
+    Return:
+        the number of bytes written
+    """
+    fields = tuple(fields)
+    spans = []
+    with open(file_path, 'rb') as f:
+        size = path.getsize(file_path)
+        if size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = mm.find(b'\n', min(start + chunk_size, size) - 1)
+                end = size if end == -1 else end + 1
+                spans.append((start, end))
+                start = end
+
+    written = 0
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for start, end in spans:
+            pending.append(executor.submit(_redact_span, file_path, start,
+                                           end, fields, redaction,
+                                           separator))
+            if len(pending) > workers * 2:
+                written += out.write(pending.pop(0).result())
+        for future in pending:
+            written += out.write(future.result())
+    return written
+
+
+def redact_rows(rows: Iterable[str],
+                fields: Iterable[str] = PII_FIELDS,
+                redaction: str = '***', separator: str = ';',
+                workers: int = None,
+                batch_size: int = 10000) -> Iterator[str]:
+    """Redact a stream of log lines using a process pool,
+    sending @batch_size lines to a worker at a time.
+    Lines are yielded back in their original order and at most
+    a few batches per worker are in flight at any time
+    """
+    fields = tuple(fields)
+
+    def batches():
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for batch in batches():
+            pending.append(executor.submit(_redact_batch, batch, fields,
+                                           redaction, separator))
+            if len(pending) > workers * 4:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+
+def get_logger(buffer_size: int = 0, queue_size: int = 0,
+               block: bool = True,
+               json_lines: bool = False) -> logging.Logger:
     """
     Set up handlers and formatters for the logger
+    Parameters:
+        - buffer_size: when > 0, records are held in a MemoryHandler
+          and written out @buffer_size at a time
+        - queue_size: when > 0, the logger only enqueues records
+          (bounded to @queue_size) and a QueueListener thread
+          redacts and writes them
+        - block: when the queue is full, wait for room if True,
+          drop the record otherwise
+        - json_lines: write each record as one redacted JSON object
     Return:
         a logger with a custom formatter
     """
@@ -38,67 +168,284 @@ def get_logger() -> logging.Logger:
     user_data.setLevel(logging.INFO)
 
     sh = logging.StreamHandler()
-    formatter = RedactingFormatter(PII_FIELDS)
+    formatter = RedactingFormatter(PII_FIELDS, json_lines)
 
     sh.setFormatter(formatter)
+    if buffer_size > 0:
+        sh = logging.handlers.MemoryHandler(buffer_size,
+                                            flushLevel=logging.ERROR,
+                                            target=sh)
+    if queue_size > 0:
+        records = queue.Queue(queue_size)
+        listener = BlockingQueueListener(records, sh)
+        listener.start()
+        atexit.register(listener.stop)
+        sh = BoundedQueueHandler(records, block)
     user_data.addHandler(sh)
     user_data.propagate = False
     return user_data
 
 
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+
+def _connect() -> mysql.connector.connection.MySQLConnection:
+    """Open a new connection using the PERSONAL_DATA_DB_* variables"""
+    username = os.getenv('PERSONAL_DATA_DB_USERNAME', 'root')
+    pwd = os.getenv('PERSONAL_DATA_DB_PASSWORD', '')
+    host = os.getenv('PERSONAL_DATA_DB_HOST', 'localhost')
+    db = os.getenv('PERSONAL_DATA_DB_NAME')
+    return mysql.connector.connect(user=username, password=pwd,
+                                   host=host, database=db)
+
+
 def get_db() -> mysql.connector.connection.MySQLConnection:
     """
     Setup a database connector for a MYSQL database
     use environmental variables to sensitive info
+    When PERSONAL_DATA_DB_POOL_SIZE is > 0 the connection comes
+    from a shared pool and should be handed back with release_db
     """
-    username = os.getenv('PERSONAL_DATA_DB_USERNAME', 'root')
-    pwd = os.getenv('PERSONAL_DATA_DB_PASSWORD', '')
-    host = os.getenv('PERSONAL_DATA_DB_HOST', 'localhost')
-    db = os.getenv('PERSONAL_DATA_DB_NAME')
+    global _db_pool
+    pool_size = int(os.getenv('PERSONAL_DATA_DB_POOL_SIZE', '0'))
     try:
-        cnx = mysql.connector.connect(user=username, password=pwd,
-                                      host=host, database=db)
-        return cnx
+        if pool_size <= 0:
+            return _connect()
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(_connect, pool_size)
+        return _db_pool.acquire()
     except mysql.connector.Error as err:
         pass
 
 
+def release_db(cnx) -> None:
+    """Give a connection from get_db back to the pool,
+    or close it when pooling is off"""
+    if _db_pool is None:
+        cnx.close()
+    else:
+        _db_pool.release(cnx)
+
+
+def export_users(db, logger: logging.Logger,
+                 batch_size: int = 1000) -> dict:
+    """Stream every row of the users table to @logger
+    reading @batch_size rows at a time so memory stays flat
+    regardless of the table size.
+    @db is any DB-API connection (mysql.connector or sqlite3)
+    Return:
+        a dict with the number of rows, rows/sec and peak RSS in KB
+    """
+    start = time.perf_counter()
+    count = 0
+    cursor = db.cursor()
+    cursor.execute("SELECT * FROM users;")
+    row_head = [col[0] for col in cursor.description]
+    rows = cursor.fetchmany(batch_size)
+    while rows:
+        for row in rows:
+            logger.info(dict(zip(row_head, row)))
+        count += len(rows)
+        rows = cursor.fetchmany(batch_size)
+    cursor.close()
+    for handler in logger.handlers:
+        handler.flush()
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': count,
+        'rows_per_sec': count / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
 def main():
     """get data from a database and log it with
     personal data redacted out
     """
+    batch_size = int(os.getenv('PERSONAL_DATA_BATCH_SIZE', '1000'))
+    json_lines = os.getenv('PERSONAL_DATA_LOG_JSON') == '1'
     my_db = get_db()
-    logger = get_logger()
+    logger = get_logger(batch_size, json_lines=json_lines)
 
-    cursor = my_db.cursor()
-    cursor.execute("SELECT * FROM users;")
-    for row in cursor.fetchall():
-        row_head = ['name', 'email', 'phone', 'ssn', 'password', 'ip',
-                    'last_login', 'user_agent']
-        row_elems = ([str(entry) for entry in row])
-        rhe = list(zip(row_head, row_elems))
-        logger.info('; '.join(['='.join(elem) for elem in rhe]))
+    summary = export_users(my_db, logger, batch_size)
+    release_db(my_db)
+    line = ('exported {rows} rows; {rows_per_sec:.0f} rows/sec; '
+            'peak RSS {peak_rss_kb} KB'.format(**summary))
+    if _db_pool is not None:
+        line += ('; pool hits {hits}, misses {misses}, '
+                 'idle {idle}'.format(**_db_pool.stats()))
+    logger.info(line)
+    for handler in logger.handlers:
+        handler.flush()
 
 
 class RedactingFormatter(logging.Formatter):
     """ Redacting Formatter class
+    Besides `key=value;` strings, records can carry structured
+    data, either as a dict message or as a dict passed with
+    extra={'data': ...}, which is redacted by key lookup
         """
 
     REDACTION = "***"
     FORMAT = "[HOLBERTON] %(name)s %(levelname)s %(asctime)-15s: %(message)s"
     SEPARATOR = ";"
+    DATA_ATTR = "data"
 
-    def __init__(self, fields: List[str]):
-        """Initialize the class"""
+    def __init__(self, fields: List[str], json_lines: bool = False):
+        """Initialize the class
+        @json_lines: emit each record as a JSON object instead of
+        the FORMAT line"""
         super(RedactingFormatter, self).__init__(self.FORMAT)
-        self.fields = fields
+        self.fields = tuple(fields)
+        self.json_lines = json_lines
+        self._field_set = frozenset(self.fields)
+        self._key = (self.fields, self.REDACTION, self.SEPARATOR)
+
+    @staticmethod
+    def structured_data(record: logging.LogRecord) -> dict:
+        """Return the structured data of @record, None if there is none"""
+        if isinstance(record.msg, dict) and not record.args:
+            return record.msg
+        data = getattr(record, RedactingFormatter.DATA_ATTR, None)
+        return data if isinstance(data, dict) else None
+
+    def redact(self, record: logging.LogRecord) -> Tuple[str, dict]:
+        """Return the rendered message and the structured data of
+        @record with personal info redacted. The result is cached
+        on the record so a record going through several handlers
+        is only redacted once"""
+        cached = getattr(record, '_redacted', None)
+        if cached is not None and (cached[0] is self._key or
+                                   cached[0] == self._key):
+            return cached[1]
+        data = self.structured_data(record)
+        if data is not None and data is record.msg:
+            redacted_msg = ''
+        else:
+            redacted_msg = filter_datum(self.fields, self.REDACTION,
+                                        record.getMessage(), self.SEPARATOR)
+        if data is not None:
+            data = {key: self.REDACTION if key in self._field_set else value
+                    for key, value in data.items()}
+        record._redacted = (self._key, (redacted_msg, data))
+        return redacted_msg, data
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """Format a log record y redacting any personal info
+        record.msg and record.args are left untouched"""
+        redacted_msg, data = self.redact(record)
+        if data is not None:
+            pairs = (self.SEPARATOR + ' ').join(
+                '{}={}'.format(key, value) for key, value in data.items())
+            redacted_msg = ' '.join(filter(None, (redacted_msg, pairs)))
+        record.message = redacted_msg
+        return super().formatMessage(record)
 
     def format(self, record: logging.LogRecord) -> str:
-        """Format a log record y redacting any personal info"""
-        redacted_msg = filter_datum(self.fields, self.REDACTION,
-                                    record.msg, self.SEPARATOR)
-        record.msg = redacted_msg
-        return super().format(record)
+        """Format a log record, as a JSON object in json_lines mode"""
+        if not self.json_lines:
+            return super().format(record)
+        redacted_msg, data = self.redact(record)
+        line = {'name': record.name, 'levelname': record.levelname,
+                'asctime': self.formatTime(record)}
+        if redacted_msg:
+            line['message'] = redacted_msg
+        if data is not None:
+            line[self.DATA_ATTR] = data
+        return json.dumps(line, default=str)
+
+
+class ConnectionPool():
+    """Keep up to @size idle connections made by @connect
+    and hand them out again instead of reconnecting"""
+
+    def __init__(self, connect: Callable, size: int = 5):
+        """Initialize the class"""
+        self.connect = connect
+        self.idle = queue.LifoQueue(size)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self):
+        """Return a healthy idle connection or a new one"""
+        while True:
+            try:
+                cnx = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if self.is_healthy(cnx):
+                with self.lock:
+                    self.hits += 1
+                return cnx
+            cnx.close()
+        with self.lock:
+            self.misses += 1
+        return self.connect()
+
+    def release(self, cnx) -> None:
+        """Put @cnx back in the pool, closing it if the pool is full"""
+        try:
+            self.idle.put_nowait(cnx)
+        except queue.Full:
+            cnx.close()
+
+    @staticmethod
+    def is_healthy(cnx) -> bool:
+        """Check a pooled connection is still usable"""
+        is_connected = getattr(cnx, 'is_connected', None)
+        if is_connected is None:
+            return True
+        try:
+            return is_connected()
+        except Exception:
+            return False
+
+    def stats(self) -> dict:
+        """Pool hit/miss counts and idle connections"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'idle': self.idle.qsize()}
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler for a bounded queue that either blocks
+    or drops records when the queue is full"""
+
+    def __init__(self, records: queue.Queue, block: bool = True):
+        """Initialize the class"""
+        super().__init__(records)
+        self.block = block
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Keep structured records as they are so the listener can
+        redact them by key, render the others as QueueHandler does"""
+        if RedactingFormatter.structured_data(record) is None:
+            return super().prepare(record)
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put @record on the queue following the full-queue policy"""
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BlockingQueueListener(logging.handlers.QueueListener):
+    """Queue listener whose stop waits for room in a bounded queue
+    instead of failing with queue.Full, so every record queued
+    before stop() is written"""
+
+    def enqueue_sentinel(self) -> None:
+        """Put the stop sentinel after the queued records"""
+        self.queue.put(self._sentinel)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests of filtered_logger"""
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code: str) -> subprocess.CompletedProcess:
+    """Run @code with filtered_logger importable"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        p for p in (ROOT, env.get('PYTHONPATH')) if p)
+    return subprocess.run([sys.executable, '-c', code], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+
+def test_queue_flushed_at_exit():
+    """Records still in a full bounded queue are written at exit"""
+    out = run('''
+import filtered_logger
+logger = filtered_logger.get_logger(queue_size=2)
+for i in range(1000):
+    logger.info('line %d', i)
+''')
+    lines = out.stderr.splitlines()
+    assert len(lines) == 1000
+    assert 'Traceback' not in out.stderr
+
+
+def test_json_lines():
+    """get_logger(json_lines=True) writes redacted JSON objects"""
+    out = run('''
+import filtered_logger
+logger = filtered_logger.get_logger(json_lines=True)
+logger.info({'email': 'bob@example.com', 'ip': '10.0.0.1'})
+''')
+    line = json.loads(out.stderr)
+    assert line['data'] == {'email': '***', 'ip': '10.0.0.1'}
+
+
+def test_pool_counts_threads():
+    """Every acquire from concurrent threads is counted once"""
+    out = run('''
+import threading
+import filtered_logger
+pool = filtered_logger.ConnectionPool(object, 4)
+
+def work():
+    for _ in range(1000):
+        pool.release(pool.acquire())
+
+threads = [threading.Thread(target=work) for _ in range(8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+stats = pool.stats()
+print(stats['hits'] + stats['misses'])
+''')
+    assert out.stdout == '8000\n'
@@ -4,6 +4,7 @@ Route module for the API
 """
 from os import getenv
 from api.v1.views import app_views
+from api.v1.auth.auth import PathMatcher
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
 import os
@@ -35,14 +36,18 @@ if auth_type == 'session_db_auth':
     from api.v1.auth.session_db_auth import SessionDBAuth
     auth = SessionDBAuth()
 
+# for the views, without importing this module
+app.extensions['auth'] = auth
+
+excl_paths = PathMatcher(['/api/v1/status/', '/api/v1/unauthorized/',
+                          '/api/v1/forbidden/', '/api/v1/auth_session/login/'])
+
 
 @app.before_request
 def before_request():
     """Determine which routes require authentication"""
     if auth is None:
         return
-    excl_paths = ['/api/v1/status/', '/api/v1/unauthorized/',
-                  '/api/v1/forbidden/', '/api/v1/auth_session/login/']
     req_auth = auth.require_auth(request.path, excl_paths)
     if req_auth is False:
         return
@@ -5,6 +5,49 @@ from typing import List, TypeVar
 import os
 
 
+class PathMatcher():
+    """Excluded paths compiled once: a set of the exact paths and a
+    trie of the prefixes of the wildcard ones, so a path is checked
+    in O(len(path)) whatever the number of excluded paths"""
+
+    END = ''
+
+    def __init__(self, excluded_paths: List[str] = None):
+        """Compile @excluded_paths"""
+        self.exact = set()
+        self.prefixes = {}
+        for p in excluded_paths or []:
+            if '*' not in p:
+                self.exact.add(p)
+                continue
+            node = self.prefixes
+            for char in p.split('*')[0]:
+                if self.END in node:
+                    # a shorter prefix already matches
+                    break
+                node = node.setdefault(char, {})
+            else:
+                node.clear()
+                node[self.END] = True
+
+    def match(self, path: str) -> bool:
+        """True if @path, with a trailing slash, is excluded"""
+        if path[-1:] != '/':
+            path = path + '/'
+        if path in self.exact:
+            return True
+        node = self.prefixes
+        if not node:
+            return False
+        for char in path:
+            if self.END in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return self.END in node
+
+
 class Auth():
     """Base authentication class"""
 
@@ -13,27 +56,18 @@ class Auth():
         Parameters:
             - Path: string representing an api route path
             - excluded_paths: List of paths that dont require authentication
+              or a PathMatcher compiled from it
         Return:
             False if @path in the list of @excluded_paths
             True otherwise
         """
         if path is None:
             return True
-        if excluded_paths is None or len(excluded_paths) == 0:
-            return True
-        if path[-1] != '/':
-            path = path + '/'
-        for p in excluded_paths:
-            if '*' in p:
-                common_root = p.split('*')[0]
-                end = len(common_root)
-                if path[:end] == common_root:
-                    return False
-            else:
-                if path == p:
-                    return False
-        else:
+        if not excluded_paths:
             return True
+        if not isinstance(excluded_paths, PathMatcher):
+            excluded_paths = PathMatcher(excluded_paths)
+        return not excluded_paths.match(path)
 
     def authorization_header(self, request=None) -> str:
         """get an authorization response header"""
@@ -1,63 +1,187 @@
 #!/usr/bin/env python3
 """Authentication module to handle basic authentication"""
-import re
 from api.v1.auth.auth import Auth
+from collections import OrderedDict
+from models.base import LISTENERS
 from models.user import User
-import base64
+from os import getenv
+import binascii
+import hashlib
+import hmac
+import os
+import threading
+import time
 from typing import TypeVar
 
 
+def _b64decode(data: str) -> bytes:
+    """Bytes of the base64 @data, None if @data is None or invalid"""
+    if data is None:
+        return None
+    try:
+        return binascii.a2b_base64(data)
+    except ValueError:
+        return None
+
+
+def _split_credentials(raw: bytes) -> (str, str):
+    """Email and password of the decoded credentials @raw, split on
+    the first ':'. (None, None) if @raw is None, has no ':', an empty
+    email or is not utf-8"""
+    if raw is None:
+        return (None, None)
+    email, sep, pwd = raw.partition(b':')
+    if not sep or not email:
+        return (None, None)
+    try:
+        return (email.decode('utf-8'), pwd.decode('utf-8'))
+    except ValueError:
+        return (None, None)
+
+
+class CredentialCache():
+    """Bounded LRU cache of the verified Authorization headers with
+    a time to live. The headers are stored as a keyed hash and map
+    to the id of their user. The entries of a user are dropped when
+    it is removed or saved with another email or password"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """Create an empty cache of @maxsize entries kept @ttl seconds"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = os.urandom(32)
+        self.entries = OrderedDict()
+        self.by_user = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        LISTENERS.append(self.on_change)
+
+    def digest(self, header: str) -> bytes:
+        """Keyed hash of @header"""
+        return hmac.new(self.key, header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def get(self, header: str) -> str:
+        """Id of the user of @header, None if not cached"""
+        digest = self.digest(header)
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._drop(digest)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, header: str, user: TypeVar('User')):
+        """Cache @header as verified for @user"""
+        digest = self.digest(header)
+        with self.lock:
+            if digest in self.entries:
+                self._drop(digest)
+            self.entries[digest] = (user.id, time.monotonic() + self.ttl)
+            keys, _ = self.by_user.get(user.id, (set(), None))
+            keys.add(digest)
+            self.by_user[user.id] = (keys, (user.email, user.password))
+            while len(self.entries) > self.maxsize:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        """Drop the entries of the user @user_id"""
+        with self.lock:
+            keys, _ = self.by_user.pop(user_id, (set(), None))
+            for digest in keys:
+                del self.entries[digest]
+            self.invalidations += len(keys)
+
+    def on_change(self, event: str, obj):
+        """Listener of Base.save and Base.remove"""
+        if not isinstance(obj, User):
+            return
+        with self.lock:
+            _, cached = self.by_user.get(obj.id, (None, None))
+            if cached is None or (event == 'save' and
+                                  cached == (obj.email, obj.password)):
+                return
+        self.invalidate(obj.id)
+
+    def _drop(self, digest: bytes):
+        """Drop one entry, the lock is held"""
+        user_id, _ = self.entries.pop(digest)
+        keys, _ = self.by_user[user_id]
+        keys.discard(digest)
+        if not keys:
+            del self.by_user[user_id]
+
+    def stats(self) -> dict:
+        """Size and hit rate of the cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self.entries), 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
 class BasicAuth(Auth):
     """Handle logic for basic authentication
     """
+    # longer Authorization headers are rejected before decoding
+    max_header_size = 4096
+
     def __init__(self) -> None:
         """initialize the parent class"""
         super().__init__()
+        self.cache = CredentialCache(
+            int(getenv('BASIC_AUTH_CACHE_SIZE', '1024')),
+            float(getenv('BASIC_AUTH_CACHE_TTL', '60')))
 
     def extract_base64_authorization_header(self,
                                             authorization_header: str) -> str:
         """Extract the base64 part of a Basic
-        Authentication Header"""
-        if authorization_header is None:
-            return None
-        if type(authorization_header) is not str:
+        Authentication Header, None if it is longer than
+        max_header_size"""
+        header = authorization_header
+        if type(header) is not str or len(header) > self.max_header_size:
             return None
-        if authorization_header[0:6] != 'Basic ':
+        if not header.startswith('Basic '):
             return None
-        return authorization_header[6:]
+        return header[6:]
 
     def decode_base64_authorization_header(self,
                                            base64_authorization_header: str) -> str:  # noqa
         """
         decode a string from base64 to a utf-8 string
         """
-        header_text = base64_authorization_header
-        if header_text is None:
-            return None
-        if type(header_text) is not str:
+        if type(base64_authorization_header) is not str:
             return None
+        raw = _b64decode(base64_authorization_header)
         try:
-            ht_b = bytes(header_text, 'utf-8')
-            s = base64.b64decode(ht_b).decode('utf-8')
-            return s
-        except Exception as e:
+            return None if raw is None else raw.decode('utf-8')
+        except ValueError:
             return None
 
     def extract_user_credentials(self,
                                  decoded_base64_authorization_header: str) -> (str, str):  # noqa
         """Get username and email from a decoded string"""
-        auth_header_str = decoded_base64_authorization_header
-        if auth_header_str is None:
-            return (None, None)
-        if type(auth_header_str) is not str:
-            return (None, None)
-        if ':' not in auth_header_str:
-            return (None, None)
-        match = re.search(r'([\w@.]+):(.*)', auth_header_str).groups()
-        if match:
-            return match
-        else:
+        if type(decoded_base64_authorization_header) is not str:
             return (None, None)
+        return _split_credentials(
+            decoded_base64_authorization_header.encode('utf-8'))
+
+    def parse_authorization_header(self,
+                                   authorization_header: str) -> (str, str):
+        """Get the email and password of a Basic Authorization
+        header in one pass over its bytes, (None, None) if the
+        header is invalid or longer than max_header_size"""
+        return _split_credentials(_b64decode(
+            self.extract_base64_authorization_header(authorization_header)))
 
     def user_object_from_credentials(self, user_email: str,
                                      user_pwd: str) -> TypeVar('User'):
@@ -86,7 +210,20 @@ class BasicAuth(Auth):
         process"""
         header_text = self.authorization_header(request)
         ht_64 = self.extract_base64_authorization_header(header_text)
-        ht_up = self.decode_base64_authorization_header(ht_64)
-        user_email, user_pwd = self.extract_user_credentials(ht_up)
+        if ht_64 is None:
+            return None
+        user_id = self.cache.get(header_text)
+        if user_id is not None:
+            user = User.get(user_id)
+            if user is not None:
+                return user
+            self.cache.invalidate(user_id)
+        user_email, user_pwd = _split_credentials(_b64decode(ht_64))
         user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self.cache.put(header_text, user)
         return user
+
+    def cache_stats(self) -> dict:
+        """Hit rate metrics of the credential cache"""
+        return self.cache.stats()
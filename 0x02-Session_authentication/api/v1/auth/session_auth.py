@@ -2,14 +2,14 @@
 """Basic session auth class"""
 from typing import TypeVar
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import SessionStore
 from models.user import User
-import uuid
 
 
 class SessionAuth(Auth):
     """Implement basic session auth mechanisms"""
 
-    user_id_by_session_id = {}
+    user_id_by_session_id = SessionStore()
 
     def create_session(self, user_id: str = None) -> str:
         """Create a session id"""
@@ -17,9 +17,7 @@ class SessionAuth(Auth):
             return None
         if type(user_id) is not str:
             return None
-        session_id = str(uuid.uuid4())
-        SessionAuth.user_id_by_session_id[session_id] = user_id
-        return session_id
+        return SessionAuth.user_id_by_session_id.create(user_id)
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """Get user_id associated with @session_id"""
@@ -27,8 +25,8 @@ class SessionAuth(Auth):
             return None
         if type(session_id) is not str:
             return None
-        uid = SessionAuth.user_id_by_session_id.get(session_id, None)
-        return uid
+        session = SessionAuth.user_id_by_session_id.get(session_id)
+        return None if session is None else session.user_id
 
     def current_user(self, request=None) -> TypeVar('User'):
         """get a user id from a session cookie"""
@@ -46,5 +44,9 @@ class SessionAuth(Auth):
         uid = self.user_id_for_session_id(session_id)
         if uid is None:
             return False
-        del SessionAuth.user_id_by_session_id[session_id]
+        SessionAuth.user_id_by_session_id.pop(session_id)
         return True
+
+    def session_counts(self) -> tuple:
+        """Number of active and expired sessions"""
+        return len(SessionAuth.user_id_by_session_id), 0
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Basic session auth class with expiry
 with permanent storage"""
+from datetime import datetime, timedelta
 from typing import TypeVar
 from models.user_session import UserSession
 from api.v1.auth.session_exp_auth import SessionExpAuth
@@ -27,23 +28,44 @@ class SessionDBAuth(SessionExpAuth):
         return sess_db_id
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
-        """Confirm session_id is present in the file
-        If present, frun the super class logic"""
+        """Get the user_id of the stored session @session_id
+        The user_id and the creation time come from the UserSession,
+        so with DB_FORMAT=sqlite a session created by one worker is
+        valid in all of them"""
+        if session_id is None:
+            return None
         try:
             sess_db_id = UserSession.search({'session_id': session_id})[0]
-        except KeyError:
+        except (KeyError, IndexError):
+            return None
+        if self.session_duration > 0 and datetime.utcnow() > \
+                sess_db_id.created_at + \
+                timedelta(seconds=self.session_duration):
             return None
+        return sess_db_id.user_id
 
-        if sess_db_id:
-            return super().user_id_for_session_id(sess_db_id.session_id)
-        return None
+    def session_counts(self) -> tuple:
+        """Number of active and of expired sessions in the UserSession
+        store, so with DB_FORMAT=sqlite every worker reports the same
+        counts. Expired sessions stay stored until their logout, so
+        counting them scans the sessions"""
+        super().session_counts()
+        stored = UserSession.count()
+        if self.session_duration <= 0:
+            return stored, 0
+        expired = UserSession.count_before(
+            'created_at',
+            datetime.utcnow() - timedelta(seconds=self.session_duration))
+        return stored - expired, expired
 
     def destroy_session(self, request=None) -> bool:
         """remove the session id from the file storage"""
         session_db_id = self.session_cookie(request)
         if session_db_id is None:
             return False
-        sess_db_id = UserSession.search({'session_id': session_db_id})[0]
-        sess_db_id.remove()
-        super().destroy_session(request)
+        sess_db = UserSession.search({'session_id': session_db_id})
+        if not super().destroy_session(request):
+            return False
+        for sess_db_id in sess_db:
+            sess_db_id.remove()
         return True
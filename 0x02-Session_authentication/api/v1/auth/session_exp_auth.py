@@ -3,7 +3,7 @@
 from typing import TypeVar
 from api.v1.auth.session_auth import SessionAuth
 from os import getenv
-from datetime import datetime, timedelta
+import time
 
 
 class SessionExpAuth(SessionAuth):
@@ -20,30 +20,26 @@ class SessionExpAuth(SessionAuth):
         except Exception:
             self.session_duration = 0
 
-    def create_session(self, user_id: str = None) -> str:
-        """Create a session id and store it in memory"""
-        sess_id = super().create_session(user_id)
-        if sess_id is None:
-            return None
-        sess_dict = {}
-        sess_dict['user_id'] = user_id
-        sess_dict['created_at'] = datetime.now()
-        self.user_id_by_session_id[sess_id] = sess_dict
-        return sess_id
-
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """Get a user_id associtated with session_id"""
         if session_id is None:
             return None
-        sess_dict = self.user_id_by_session_id.get(session_id, None)
-        if sess_dict is None:
+        session = self.user_id_by_session_id.get(session_id)
+        if session is None:
             return None
         if self.session_duration <= 0:
-            return sess_dict['user_id']
-        if 'created_at' in sess_dict is False:
-            return None
-        created_at = sess_dict.get('created_at')
-        if (datetime.now() >
-                created_at + timedelta(seconds=self.session_duration)):
+            return session.user_id
+        if time.time() > session.created_at + self.session_duration:
+            # can never be valid again
+            self.user_id_by_session_id.pop(session_id, expired=True)
             return None
-        return sess_dict['user_id']
+        return session.user_id
+
+    def session_counts(self) -> tuple:
+        """Number of active sessions and of sessions expired so far,
+        the expired ones are removed from the store"""
+        store = self.user_id_by_session_id
+        if self.session_duration <= 0:
+            return len(store), 0
+        expired = store.expire_before(time.time() - self.session_duration)
+        return len(store), expired
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Thread-safe in-memory session store"""
+from collections import namedtuple
+import threading
+import time
+import uuid
+
+
+# compact record of a session, created_at in seconds since the epoch
+Session = namedtuple('Session', ('user_id', 'created_at'))
+
+
+class SessionStore():
+    """Sessions by session id, spread over lock-striped shards so
+    request threads only contend when they hit the same shard.
+    Every shard is a dict kept in creation order, so the expired
+    sessions are always at its start"""
+
+    def __init__(self, shards: int = 64):
+        """Create an empty store, @shards is rounded to a power of 2"""
+        size = 1
+        while size < shards:
+            size *= 2
+        self._mask = size - 1
+        self._shards = [{} for _ in range(size)]
+        self._locks = [threading.Lock() for _ in range(size)]
+        self._expired = [0] * size
+
+    def create(self, user_id: str) -> str:
+        """Create a session of @user_id and return its id"""
+        session_id = str(uuid.uuid4())
+        i = hash(session_id) & self._mask
+        with self._locks[i]:
+            self._shards[i][session_id] = Session(user_id, time.time())
+        return session_id
+
+    def get(self, session_id: str) -> Session:
+        """Session of @session_id, None if there is none"""
+        # a single dict lookup is atomic, no lock needed to read
+        return self._shards[hash(session_id) & self._mask].get(session_id)
+
+    def pop(self, session_id: str, expired: bool = False) -> Session:
+        """Remove the session of @session_id and return it, counted
+        as expired if @expired"""
+        i = hash(session_id) & self._mask
+        with self._locks[i]:
+            session = self._shards[i].pop(session_id, None)
+            if expired and session is not None:
+                self._expired[i] += 1
+            return session
+
+    def __len__(self) -> int:
+        """Number of sessions"""
+        return sum(len(shard) for shard in self._shards)
+
+    def expire_before(self, cutoff: float) -> int:
+        """Remove the sessions created before @cutoff and return the
+        number of sessions expired so far. Every session is walked
+        once when it expires, so a call costs O(shards) plus the
+        sessions it removes"""
+        for i in range(len(self._shards)):
+            with self._locks[i]:
+                # read under the lock, another call may have replaced it
+                shard = self._shards[i]
+                expired = []
+                for session_id, session in shard.items():
+                    if session.created_at >= cutoff:
+                        break
+                    expired.append(session_id)
+                for session_id in expired:
+                    del shard[session_id]
+                if len(expired) > len(shard):
+                    # a dict keeps the slots of deleted keys and walks
+                    # them on iteration, copy it once most keys are gone
+                    self._shards[i] = dict(shard)
+                self._expired[i] += len(expired)
+        return sum(self._expired)
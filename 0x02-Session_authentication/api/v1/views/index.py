@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+from flask import current_app, jsonify, abort
 from api.v1.views import app_views
+from models.base import MODELS
+import re
 
 
 @app_views.route('/status', methods=['GET'], strict_slashes=False)
@@ -18,11 +20,27 @@ def status() -> str:
 def stats() -> str:
     """ GET /api/v1/stats
     Return:
-      - the number of each objects
+      - the number of each objects, of active and expired sessions
+      - the size of the store on disk and the time of its last snapshot
     """
-    from models.user import User
+    auth = current_app.extensions.get('auth')
     stats = {}
-    stats['users'] = User.count()
+    store_size = 0
+    last_snapshot = None
+    for name, model in MODELS.items():
+        key = re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower() + 's'
+        stats[key] = model.count()
+        storage = model.storage_stats()
+        store_size += storage['size']
+        if storage['last_snapshot'] is not None:
+            last_snapshot = max(last_snapshot or 0, storage['last_snapshot'])
+    if hasattr(auth, 'session_counts'):
+        stats['active_sessions'], stats['expired_sessions'] = \
+            auth.session_counts()
+    if hasattr(auth, 'cache_stats'):
+        stats['auth_cache'] = auth.cache_stats()
+    stats['store_size'] = store_size
+    stats['last_snapshot'] = last_snapshot
     return jsonify(stats)
 
 
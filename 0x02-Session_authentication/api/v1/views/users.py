@@ -2,18 +2,84 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, request, Response
 from models.user import User
+import json
+
+STREAM_PAGE_SIZE = 1000
+SEARCH_ATTRIBUTES = ('email', 'first_name', 'last_name')
+
+
+def stream_users(after: str = None, limit: int = None):
+    """ Yield the JSON array of users page by page
+    """
+    yield '['
+    sep = ''
+    while limit is None or limit > 0:
+        size = STREAM_PAGE_SIZE if limit is None else \
+            min(limit, STREAM_PAGE_SIZE)
+        users = User.page(after, size)
+        for user in users:
+            yield sep + json.dumps(user.to_json())
+            sep = ','
+        if len(users) < size:
+            break
+        after = users[-1].id
+        if limit is not None:
+            limit -= len(users)
+    yield ']'
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (optional):
+      - limit: maximum number of users to return
+      - after: id of the last user of the previous page
+      - stream: if 1, the users are streamed as they are serialized
+      - email, first_name, last_name: only return users with these
+        values, an email ending with * matches on the prefix
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, ordered by id
+        when paginated, the X-Next-After header holds the id to
+        pass as `after` to get the next page
+      - 400 if limit is not a positive integer
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return jsonify({'error': "limit must be a positive integer"}), 400
+    filters = {k: request.args.get(k) for k in SEARCH_ATTRIBUTES
+               if k in request.args}
+    if filters:
+        email = filters.get('email')
+        if email is not None and email.endswith('*'):
+            del filters['email']
+            users = User.search_prefix('email', email[:-1], filters)
+        else:
+            users = User.search(filters)
+        users.sort(key=lambda user: user.id)
+        if after is not None:
+            users = [user for user in users if user.id > after]
+        if limit is not None:
+            users = users[:limit]
+    elif request.args.get('stream') == '1':
+        return Response(stream_users(after, limit),
+                        mimetype='application/json')
+    elif limit is None and after is None:
+        all_users = [user.to_json() for user in User.all()]
+        return jsonify(all_users)
+    else:
+        users = User.page(after, limit)
+    resp = jsonify([user.to_json() for user in users])
+    if limit is not None and len(users) == limit:
+        resp.headers['X-Next-After'] = users[-1].id
+    return resp
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Measure the cost of parsing a Basic Authorization header per
+request: the three steps of the first version, the three
+BasicAuth methods and BasicAuth.parse_authorization_header
+Usage: ./bench_basic_header.py [requests]
+"""
+from api.v1.auth.basic_auth import BasicAuth
+import base64
+import re
+import sys
+import time
+
+
+def loop_parse(header: str) -> tuple:
+    """ extract, decode and split of the first version
+    """
+    if header is None or type(header) is not str:
+        return (None, None)
+    if header[0:6] != 'Basic ':
+        return (None, None)
+    try:
+        decoded = base64.b64decode(bytes(header[6:], 'utf-8')).decode('utf-8')
+    except Exception:
+        return (None, None)
+    if ':' not in decoded:
+        return (None, None)
+    return re.search(r'([\w@.]+):(.*)', decoded).groups()
+
+
+def basic_auth_steps(basic_auth: BasicAuth):
+    """ The three BasicAuth methods chained like current_user did
+    """
+    def parse(header: str) -> tuple:
+        """ Credentials of @header
+        """
+        return basic_auth.extract_user_credentials(
+            basic_auth.decode_base64_authorization_header(
+                basic_auth.extract_base64_authorization_header(header)))
+    return parse
+
+
+def per_request(parse, header: str, requests: int) -> float:
+    """ Seconds per parse of @header
+    """
+    start = time.perf_counter()
+    for _ in range(requests):
+        parse(header)
+    return (time.perf_counter() - start) / requests
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    basic_auth = BasicAuth()
+    parsers = (('first version', loop_parse),
+               ('three methods', basic_auth_steps(basic_auth)),
+               ('parse_authorization_header',
+                basic_auth.parse_authorization_header))
+    headers = (
+        ('valid', 'Basic ' + base64.b64encode(
+            b'bob@dylan.com:H0lbertonSchool98!').decode()),
+        ('email with +', 'Basic ' + base64.b64encode(
+            b'bob+test@dylan.com:H0lbertonSchool98!').decode()),
+        ('oversized', 'Basic ' + 'A' * 8192),
+    )
+    for name, header in headers:
+        print("{} header:".format(name))
+        for parser_name, parse in parsers:
+            print("  {}: {:.0f} ns/request, {}".format(
+                parser_name, per_request(parse, header, requests) * 1e9,
+                parse(header)))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Measure the boot time (User.load_from_file), the first lookup
+and the peak memory of a fresh process with a snapshot of many
+users, loaded eagerly and with DB_LAZY_LOAD=1
+Usage: ./bench_boot.py [users]
+"""
+from models.base import write_snapshot
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+BOOT = '''
+import resource
+import time
+start = time.perf_counter()
+from models.user import User
+User.load_from_file()
+boot = time.perf_counter() - start
+start = time.perf_counter()
+assert len(User.search({'email': 'user0@example.com'})) == 1
+lookup = time.perf_counter() - start
+print(boot, lookup, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def snapshot(users: int):
+    """ Write a .db_User.json snapshot of @users users in the
+    current directory
+    """
+    objs = []
+    for i in range(users):
+        obj_id = str(uuid.uuid4())
+        objs.append((obj_id, json.dumps({
+            'id': obj_id, 'email': 'user{}@example.com'.format(i),
+            '_password': None, 'first_name': 'Bob', 'last_name': 'Dylan',
+            'created_at': '2022-06-01T12:00:00',
+            'updated_at': '2022-06-01T12:00:00'})))
+    write_snapshot('User', objs)
+
+
+def boot(lazy: bool) -> tuple:
+    """ Boot seconds, first lookup seconds and peak RSS in KiB of a
+    process loading the snapshot of the current directory
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.abspath(__file__)), DB_LAZY_LOAD='1' if lazy else '0')
+    out = subprocess.run([sys.executable, '-c', BOOT], env=env, check=True,
+                         stdout=subprocess.PIPE, universal_newlines=True)
+    boot_s, lookup_s, rss = out.stdout.split()
+    return float(boot_s), float(lookup_s), int(rss)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        snapshot(users)
+        print("{} users, snapshot of {:.1f} MB".format(
+            users, os.path.getsize('.db_User.json') / 1e6))
+        for lazy in (False, True):
+            boot_s, lookup_s, rss = boot(lazy)
+            print("DB_LAZY_LOAD={}: boot {:.1f} ms, first lookup {:.1f} ms, "
+                  "peak RSS {:.0f} MB".format(int(lazy), boot_s * 1e3,
+                                              lookup_s * 1e3, rss / 1024))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Measure User creates/sec with 10k, 100k and 1M existing users,
+rewriting the whole snapshot on every save and with DB_JOURNAL=1
+Usage: ./bench_creates.py [seconds] [users ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+CREATE = '''
+import sys
+import time
+from models.base import DATA
+from models.user import User
+User.load_from_file()
+for i in range(int(sys.argv[1])):
+    u = User(email='user{}@example.com'.format(i))
+    DATA['User'][u.id] = u
+    u._index()
+User.save_to_file()
+creates = 0
+start = time.perf_counter()
+end = start + float(sys.argv[2])
+while time.perf_counter() < end:
+    u = User()
+    u.email = 'new{}@example.com'.format(creates)
+    u.save()
+    creates += 1
+print(creates / (time.perf_counter() - start))
+'''
+
+
+def creates_per_second(users: int, journal: bool, seconds: float) -> float:
+    """ Creates/sec for @seconds in a fresh process whose store holds
+    @users users
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.abspath(__file__)), DB_JOURNAL='1' if journal else '0')
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(
+            [sys.executable, '-c', CREATE, str(users), str(seconds)],
+            cwd=tmp, env=env, check=True, stdout=subprocess.PIPE,
+            universal_newlines=True)
+    return float(out.stdout)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sizes = [int(n) for n in sys.argv[2:]] or [10000, 100000, 1000000]
+    for users in sizes:
+        rewrite = creates_per_second(users, False, seconds)
+        journal = creates_per_second(users, True, seconds)
+        print("{} users: rewrite {:.1f} creates/s, DB_JOURNAL=1 {:.0f} "
+              "creates/s ({:.0f}x)".format(users, rewrite, journal,
+                                           journal / rewrite))
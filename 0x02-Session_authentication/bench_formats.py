@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Compare the JSON and binary (DB_FORMAT=binary) snapshot formats:
+save and load throughput and size of the file
+Usage: ./bench_formats.py [users]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+SAVE_LOAD = '''
+import os
+import sys
+import time
+from models.base import DATA, snapshot_path
+from models.user import User
+for i in range(int(sys.argv[1])):
+    u = User(email='user{}@example.com'.format(i), _password='$x$y',
+             first_name='Bob', last_name='Dylan')
+    DATA['User'][u.id] = u
+start = time.perf_counter()
+User.save_to_file()
+save = time.perf_counter() - start
+start = time.perf_counter()
+User.load_from_file()
+load = time.perf_counter() - start
+assert User.count() == int(sys.argv[1])
+print(save, load, os.path.getsize(snapshot_path('User')))
+'''
+
+
+def save_load(users: int, storage_format: str) -> tuple:
+    """ Save seconds, load seconds and file size of a snapshot of
+    @users users in @storage_format
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.abspath(__file__)), DB_FORMAT=storage_format,
+        DB_LAZY_LOAD='0')
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(
+            [sys.executable, '-c', SAVE_LOAD, str(users)],
+            cwd=tmp, env=env, check=True, stdout=subprocess.PIPE,
+            universal_newlines=True)
+    save, load, size = out.stdout.split()
+    return float(save), float(load), int(size)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("{} users".format(users))
+    for storage_format in ('json', 'binary'):
+        save, load, size = save_load(users, storage_format)
+        print("{}: save {:.0f} users/s, load {:.0f} users/s, {:.1f} MB "
+              "({:.0f} bytes/user)".format(storage_format, users / save,
+                                           users / load, size / 1e6,
+                                           size / users))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Measure GET /api/v1/users/me requests/sec under Basic auth with
+each password hasher: without any cache, with the verification
+cache of models.hashers and with the credential cache of BasicAuth
+Usage: ./bench_hashers.py [seconds] [hashers ...]
+"""
+from importlib.util import find_spec
+import os
+import subprocess
+import sys
+import tempfile
+
+REQUESTS = '''
+import base64
+import sys
+import time
+from models.user import User
+from api.v1.app import app
+u = User()
+u.email = 'bob@dylan.com'
+u.password = 'H0lbertonSchool98!'
+u.save()
+client = app.test_client()
+headers = {'Authorization': 'Basic ' + base64.b64encode(
+    b'bob@dylan.com:H0lbertonSchool98!').decode()}
+requests = 0
+start = time.perf_counter()
+end = start + float(sys.argv[1])
+while time.perf_counter() < end:
+    response = client.get('/api/v1/users/me', headers=headers)
+    assert response.status_code == 200
+    requests += 1
+print(requests / (time.perf_counter() - start))
+'''
+CACHES = (
+    ('no cache', {'PASSWORD_CACHE_SIZE': '0', 'BASIC_AUTH_CACHE_SIZE': '0'}),
+    ('verify cache', {'BASIC_AUTH_CACHE_SIZE': '0'}),
+    ('both caches', {}),
+)
+
+
+def requests_per_second(hasher: str, caches: dict, seconds: float) -> float:
+    """ Requests/sec for @seconds of a fresh process hashing with
+    @hasher, with the cache settings @caches
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.abspath(__file__)), AUTH_TYPE='basic_auth',
+        PASSWORD_HASHER=hasher, **caches)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(
+            [sys.executable, '-c', REQUESTS, str(seconds)], cwd=tmp,
+            env=env, check=True, stdout=subprocess.PIPE,
+            universal_newlines=True)
+    return float(out.stdout)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    hashers = sys.argv[2:] or ['pbkdf2-sha256', 'scrypt', 'bcrypt']
+    if 'bcrypt' in hashers and find_spec('bcrypt') is None:
+        print("bcrypt is not installed, skipped")
+        hashers.remove('bcrypt')
+    for hasher in hashers:
+        print("{}: {}".format(hasher, ', '.join(
+            "{} {:.1f} requests/s".format(
+                name, requests_per_second(hasher, caches, seconds))
+            for name, caches in CACHES)))
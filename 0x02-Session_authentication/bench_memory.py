@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+""" Measure the memory per user of the User instances, compared to
+instances with a per-instance __dict__ as in the first version,
+and of the whole store (DATA and the email index)
+Usage: ./bench_memory.py [users]
+"""
+from datetime import datetime
+from models.base import DATA
+from models.user import User
+import resource
+import sys
+import uuid
+
+
+class DictUser():
+    """ User of the first version: attributes in __dict__
+    """
+
+    def __init__(self, email: str):
+        """ Same attributes as User
+        """
+        self.id = str(uuid.uuid4())
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.email = email
+        self._password = None
+        self.first_name = None
+        self.last_name = None
+
+
+def bytes_per_user(build, users: int) -> tuple:
+    """ Users built by @build(email) for @users users and the growth
+    of the peak RSS per user. The users of each run are kept alive
+    so the next run cannot reuse their memory
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    objs = [build('user{}@example.com'.format(i)) for i in range(users)]
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+    return objs, rss * 1024 / users
+
+
+def store(email: str) -> User:
+    """ Build a user and keep it in the store like save() does,
+    without writing the snapshot file
+    """
+    u = User(email=email)
+    DATA['User'][u.id] = u
+    u._index()
+    return u
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print("{} users".format(users))
+    kept = []
+    for name, build in (('__dict__ instances', DictUser),
+                        ('User instances', lambda email: User(email=email)),
+                        ('User in the store', store)):
+        objs, size = bytes_per_user(build, users)
+        kept.append(objs)
+        print("{}: {:.0f} bytes/user".format(name, size))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Measure the cost of the auth lookups User.search by email and
+UserSession.search by session_id, by a linear filter of the store
+as before the indexes and through the indexes
+Usage: ./bench_search.py [users] [lookups]
+"""
+from models.base import DATA
+from models.user import User
+from models.user_session import UserSession
+import sys
+import time
+
+
+def fill(users: int):
+    """ Put @users users with one session each in the store,
+    without writing the snapshot files
+    """
+    for i in range(users):
+        u = User(email='user{}@example.com'.format(i))
+        DATA['User'][u.id] = u
+        u._index()
+        us = UserSession(user_id=u.id, session_id='session{}'.format(i))
+        DATA['UserSession'][us.id] = us
+        us._index()
+
+
+def linear_search(cls, attributes: dict) -> list:
+    """ Search of the first version: every object is compared
+    """
+    def _search(obj):
+        for k, v in attributes.items():
+            if getattr(obj, k) != v:
+                return False
+        return True
+    return list(filter(_search, DATA[cls.__name__].values()))
+
+
+def per_lookup(search, cls, attributes: list) -> float:
+    """ Seconds per search of @cls by each of @attributes
+    """
+    start = time.perf_counter()
+    for attrs in attributes:
+        assert len(search(cls, attrs)) == 1
+    return (time.perf_counter() - start) / len(attributes)
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    start = time.perf_counter()
+    fill(users)
+    print("{} users and sessions stored in {:.1f} s".format(
+        users, time.perf_counter() - start))
+    step = max(users // lookups, 1)
+    cases = [
+        (User, [{'email': 'user{}@example.com'.format(i)}
+                for i in range(0, users, step)]),
+        (UserSession, [{'session_id': 'session{}'.format(i)}
+                       for i in range(0, users, step)]),
+    ]
+    for cls, attributes in cases:
+        before = per_lookup(linear_search, cls, attributes)
+        after = per_lookup(lambda cls, attrs: cls.search(attrs), cls,
+                           attributes * 1000)
+        print("{}.search({}): linear {:.1f} ms, indexed {:.1f} us "
+              "({:.0f}x)".format(cls.__name__, list(attributes[0])[0],
+                                 before * 1e3, after * 1e6, before / after))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Measure the SessionStore with many live sessions: lookups,
+creates and destroys per second from several request threads
+Usage: ./bench_sessions.py [sessions] [seconds] [threads ...]
+"""
+from api.v1.auth.session_store import SessionStore
+import random
+import resource
+import sys
+import threading
+import time
+
+# share of the operations that create and destroy a session
+WRITES = 0.1
+
+
+def fill(store: SessionStore, sessions: int) -> list:
+    """ Create @sessions sessions in @store, return their ids
+    """
+    return [store.create('user{}'.format(i)) for i in range(sessions)]
+
+
+def load(store: SessionStore, session_ids: list, threads: int,
+         seconds: float) -> float:
+    """ Operations/sec of @threads threads looking up random
+    sessions of @session_ids, creating and destroying one session
+    for a share WRITES of the operations, for @seconds
+    """
+    counts = [0] * threads
+    end = time.perf_counter() + seconds
+
+    def worker(n: int):
+        """ Serve requests until the end of the run
+        """
+        rand = random.Random(n)
+        ops = 0
+        while time.perf_counter() < end:
+            for _ in range(100):
+                if rand.random() < WRITES:
+                    store.pop(store.create('new'))
+                else:
+                    assert store.get(rand.choice(session_ids)) is not None
+            ops += 100
+        counts[n] = ops
+
+    pool = [threading.Thread(target=worker, args=(n,))
+            for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts) / seconds
+
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    sizes = [int(t) for t in sys.argv[3:]] or [1, 4, 16]
+    store = SessionStore()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    session_ids = fill(store, sessions)
+    elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+    print("{} sessions created in {:.1f} s, {:.0f} bytes per session "
+          "(with its id)".format(sessions, elapsed, rss * 1024 / sessions))
+    for threads in sizes:
+        print("threads={}: {:.0f} ops/s".format(
+            threads, load(store, session_ids, threads, seconds)))
+    assert len(store) == sessions
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Measure GET /api/v1/users with many users, with the to_json of
+the first version that formats every user on every call and with
+the cached to_json (first request, then repeated requests)
+Usage: ./bench_view_users.py [users] [requests]
+"""
+from datetime import datetime
+from models.base import DATA, TIMESTAMP_FORMAT
+from models.user import User
+import os
+import sys
+import tempfile
+import time
+
+
+def fill(users: int):
+    """ Put @users users in the store without writing the snapshot
+    """
+    for i in range(users):
+        u = User(email='user{}@example.com'.format(i),
+                 first_name='Bob', last_name='Dylan')
+        DATA['User'][u.id] = u
+        u._index()
+
+
+def uncached_to_json(self, for_serialization: bool = False) -> dict:
+    """ to_json of the first version, without the cache
+    """
+    result = {}
+    for key, value in self.attributes().items():
+        if not for_serialization and key[0] == '_':
+            continue
+        if type(value) is datetime:
+            result[key] = value.strftime(TIMESTAMP_FORMAT)
+        else:
+            result[key] = value
+    return result
+
+
+def per_request(client, requests: int) -> float:
+    """ Seconds per GET /api/v1/users
+    """
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert client.get('/api/v1/users').status_code == 200
+    return (time.perf_counter() - start) / requests
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    os.environ.pop('AUTH_TYPE', None)
+    # an empty store, whatever the snapshot of the current directory
+    os.chdir(tempfile.mkdtemp())
+    from api.v1.app import app
+    client = app.test_client()
+    fill(users)
+    print("{} users".format(users))
+    cached_to_json = User.to_json
+    User.to_json = uncached_to_json
+    print("uncached to_json: {:.0f} ms/request".format(
+        per_request(client, requests) * 1e3))
+    User.to_json = cached_to_json
+    print("cached to_json, first request: {:.0f} ms".format(
+        per_request(client, 1) * 1e3))
+    print("cached to_json, next requests: {:.0f} ms/request".format(
+        per_request(client, requests) * 1e3))
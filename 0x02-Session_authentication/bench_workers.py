@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Measure the GET /api/v1/users/me throughput of several worker
+processes sharing one store, with session_db_auth and
+DB_FORMAT=sqlite. Every worker serves the session created by
+another process, as behind a load balancer
+Usage: ./bench_workers.py [seconds] [workers ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+SETUP = '''
+from models.user import User
+from api.v1.app import auth
+u = User()
+u.email = 'bob@example.com'
+u.save()
+print(auth.create_session(u.id))
+'''
+WORKER = '''
+import sys
+import time
+from api.v1.app import app
+client = app.test_client(use_cookies=False)
+headers = {'Cookie': '_my_session_id=' + sys.argv[1]}
+requests = 0
+end = time.perf_counter() + float(sys.argv[2])
+while time.perf_counter() < end:
+    response = client.get('/api/v1/users/me', headers=headers)
+    assert response.status_code == 200
+    requests += 1
+print(requests)
+'''
+
+
+def environ() -> dict:
+    """ Settings of the workers
+    """
+    return dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.abspath(__file__)), DB_FORMAT='sqlite',
+        AUTH_TYPE='session_db_auth', SESSION_NAME='_my_session_id',
+        SESSION_DURATION='3600')
+
+
+def load(session_id: str, workers: int, seconds: float) -> float:
+    """ Requests/sec of @workers processes requesting /users/me with
+    @session_id for @seconds
+    """
+    procs = [subprocess.Popen(
+        [sys.executable, '-c', WORKER, session_id, str(seconds)],
+        env=environ(), stdout=subprocess.PIPE, universal_newlines=True)
+        for _ in range(workers)]
+    requests = 0
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError("worker failed")
+        requests += int(out)
+    return requests / seconds
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sizes = [int(w) for w in sys.argv[2:]] or [1, 2, 4]
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        session_id = subprocess.run(
+            [sys.executable, '-c', SETUP], env=environ(), check=True,
+            stdout=subprocess.PIPE, universal_newlines=True).stdout.strip()
+        print("{} cpu(s), DB_FORMAT=sqlite".format(os.cpu_count()))
+        for workers in sizes:
+            print("workers={}: {:.0f} requests/s".format(
+                workers, load(session_id, workers, seconds)))
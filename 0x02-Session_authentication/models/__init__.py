@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+""" Models of the API
+Importing the package registers every model in models.base.MODELS
+"""
+from models.user import User
+from models.user_session import UserSession
+
+__all__ = ['User', 'UserSession']
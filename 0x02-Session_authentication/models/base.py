@@ -1,29 +1,384 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
 from datetime import datetime
 from typing import TypeVar, List, Iterable
-from os import path
+from os import getenv, path
+import atexit
 import json
+import mmap
+import os
+import re
+import threading
+import time
 import uuid
+from models import binary_storage, sqlite_storage
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
 DATA = {}
+MODELS = {}
+# callables run as listener(event, obj) after a 'save' or 'remove'
+LISTENERS = []
+INDEXES = {}
+SORTED_KEYS = {}
+ORDERS = {}
+SLOTS = {}
+JOURNAL_MODE = getenv('DB_JOURNAL') == '1'
+JOURNAL_COMPACT_EVERY = int(getenv('DB_JOURNAL_COMPACT', '1000'))
+JOURNALS = {}
+COMPACTING = set()
+LOCKS = {}
+SNAPSHOT_DELAY = float(getenv('DB_SNAPSHOT_DELAY', '0'))
+SNAPSHOTS = {}
+LAZY_LOAD = getenv('DB_LAZY_LOAD') == '1'
+STORAGE_FORMAT = getenv('DB_FORMAT', 'json')
+
+
+def class_lock(s_class: str) -> threading.RLock:
+    """ Lock guarding the in-memory objects and journal of a class
+    """
+    return LOCKS.setdefault(s_class, threading.RLock())
+
+
+def snapshot_state(s_class: str) -> dict:
+    """ Write lock, pending requests and metrics of the snapshot
+    file of a class
+    """
+    state = SNAPSHOTS.get(s_class)
+    if state is None:
+        state = SNAPSHOTS.setdefault(s_class, {
+            'lock': threading.Lock(), 'timer': None,
+            'requests': 0, 'covered': 0, 'writes': 0,
+            'last_write_ms': 0.0, 'total_write_ms': 0.0,
+            'last_write_at': None})
+    return state
+
+
+def snapshot_path(s_class: str) -> str:
+    """ Snapshot file of a class for the DB_FORMAT in use
+    """
+    if STORAGE_FORMAT == 'binary':
+        return ".db_{}.bin".format(s_class)
+    return ".db_{}.json".format(s_class)
+
+
+def write_snapshot(s_class: str, objs: list):
+    """ Atomically replace the snapshot file of a class with @objs
+    (a list of (id, object or raw JSON string)): write a temp file,
+    fsync it and rename it over the old one, so a crash never leaves
+    a truncated file. Caller holds the snapshot write lock.
+    The file is a JSON object with one entry per line so it can be
+    indexed without parsing it (see LazyObjects)
+    """
+    state = snapshot_state(s_class)
+    file_path = snapshot_path(s_class)
+    tmp_path = file_path + '.tmp'
+    start = time.perf_counter()
+    try:
+        if STORAGE_FORMAT == 'binary':
+            with open(tmp_path, 'wb') as f:
+                binary_storage.dump(f, [
+                    (obj_id, json.loads(obj) if isinstance(obj, str)
+                     else obj.attributes()) for obj_id, obj in objs])
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            with open(tmp_path, 'w') as f:
+                sep = '{\n'
+                for obj_id, obj in objs:
+                    if not isinstance(obj, str):
+                        obj = json.dumps(obj.to_json(True))
+                    f.write('{}{}: {}'.format(sep, json.dumps(obj_id), obj))
+                    sep = ',\n'
+                f.write('\n}\n' if sep == ',\n' else '{\n}\n')
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    state['writes'] += 1
+    state['last_write_ms'] = elapsed_ms
+    state['total_write_ms'] += elapsed_ms
+    state['last_write_at'] = time.time()
+
+
+@atexit.register
+def flush_snapshots():
+    """ Write the snapshots still deferred by DB_SNAPSHOT_DELAY, run
+    at exit since the timers are daemon threads
+    """
+    for state in list(SNAPSHOTS.values()):
+        timer = state['timer']
+        if timer is not None:
+            timer.cancel()
+            timer.function()
+
+
+def snapshot_items(objs) -> list:
+    """ (id, object) pairs to write in a snapshot. Objects of a
+    LazyObjects store that were never loaded are passed as raw JSON
+    """
+    if isinstance(objs, LazyObjects):
+        return objs.snapshot_items()
+    return list(objs.items())
+
+
+class LazyObjects(MutableMapping):
+    """ Objects of a class backed by a memory-mapped snapshot file.
+    Loading only maps the file, the id -> offset index of its
+    entries is built by a single scan on first access and an object
+    is built the first time it is accessed
+    """
+
+    LINE_ID = re.compile(rb'\n"([^"\\]*)": ')
+
+    def __init__(self, cls, f, mm: mmap.mmap):
+        """ Wrap the mapped snapshot @mm of @cls
+        """
+        self.cls = cls
+        self.loaded = {}
+        self._offsets = None
+        self._file = f
+        self._mm = mm
+        self._lock = threading.RLock()
+        self._starts = []
+        self._ids = []
+        self._raw_indexes = {}
+        self._scanned = set()
+
+    @property
+    def offsets(self) -> dict:
+        """ id -> offset of the entries not loaded yet
+        """
+        if self._offsets is None:
+            with self._lock:
+                if self._offsets is None:
+                    offsets = {}
+                    for m in self.LINE_ID.finditer(self._mm):
+                        obj_id = m.group(1).decode()
+                        offsets[obj_id] = m.end()
+                        self._starts.append(m.end())
+                        self._ids.append(obj_id)
+                    for obj_id in self.loaded:
+                        offsets.pop(obj_id, None)
+                    self._offsets = offsets
+        return self._offsets
+
+    @classmethod
+    def open(cls, model, file_path: str):
+        """ Map @file_path, None if it is not in the
+        one entry per line format
+        """
+        f = open(file_path, 'rb')
+        try:
+            if path.getsize(file_path) < 2:
+                f.close()
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+        if mm[:2] != b'{\n':
+            mm.close()
+            f.close()
+            return None
+        return cls(model, f, mm)
+
+    def _raw(self, obj_id: str) -> bytes:
+        """ JSON of an entry that was not loaded yet
+        """
+        start = self.offsets[obj_id]
+        end = self._mm.find(b'\n', start)
+        return self._mm[start:end].rstrip(b',')
+
+    def _load(self, obj_id: str):
+        """ Build the object @obj_id from the file
+        """
+        with self._lock:
+            obj = self.loaded.get(obj_id)
+            if obj is not None:
+                return obj
+            obj = self.cls(**json.loads(self._raw(obj_id)))
+            self.loaded[obj_id] = obj
+            del self.offsets[obj_id]
+        obj._index()
+        return obj
+
+    def _raw_index(self, attr: str) -> dict:
+        """ JSON value -> ids of the raw entries for an indexed
+        attribute, built by one scan of the file on first use
+        """
+        raw_index = self._raw_indexes.get(attr)
+        if raw_index is None:
+            self.offsets  # builds _starts/_ids
+            raw_index = {}
+            pattern = re.compile(json.dumps(attr).encode() +
+                                 rb': ("[^"\\]*(?:\\.[^"\\]*)*"|[^,}\n]*)')
+            with self._lock:
+                for m in pattern.finditer(self._mm):
+                    i = bisect_right(self._starts, m.start()) - 1
+                    if i >= 0:
+                        raw_index.setdefault(m.group(1),
+                                             []).append(self._ids[i])
+                self._raw_indexes[attr] = raw_index
+        return raw_index
+
+    def _matching_ids(self, k: str, v) -> Iterable[str]:
+        """ Ids of the raw entries that may have @k equal to @v,
+        None if @k = @v can't be searched in the raw file
+        """
+        if v is not None and type(v) not in (str, int, float, bool):
+            return None
+        value = json.dumps(v).encode()
+        if k in self.cls.indexed_attributes:
+            return self._raw_index(k).get(value, [])
+        needle = json.dumps(k).encode() + b': ' + value
+        if needle in self._scanned:
+            return []
+        ids = []
+        pos = self._mm.find(needle)
+        while pos != -1:
+            end = pos + len(needle)
+            if self._mm[end:end + 1] in (b',', b'}'):
+                i = bisect_right(self._starts, pos) - 1
+                if i >= 0:
+                    ids.append(self._ids[i])
+            pos = self._mm.find(needle, end)
+        self._scanned.add(needle)
+        return ids
+
+    def load_prefix(self, attr: str, prefix: str):
+        """ Load the objects whose @attr may start with @prefix,
+        everything if @attr is not indexed
+        """
+        offsets = self.offsets
+        if len(offsets) == 0:
+            return
+        if attr not in self.cls.indexed_attributes:
+            ids = list(offsets)
+        else:
+            # JSON string of the prefix without its closing quote
+            raw_prefix = json.dumps(prefix)[:-1].encode()
+            ids = []
+            for value, value_ids in self._raw_index(attr).items():
+                if value.startswith(raw_prefix):
+                    ids.extend(value_ids)
+        for obj_id in ids:
+            if obj_id in offsets:
+                self._load(obj_id)
+
+    def load_matching(self, attributes: dict):
+        """ Load the objects that may match @attributes. An indexed
+        attribute is looked up in a raw index of the file, other
+        attributes by searching the file for their `"key": value`,
+        everything is loaded if no attribute can be searched
+        """
+        offsets = self.offsets
+        if len(offsets) == 0:
+            return
+        ids = None
+        for k, v in attributes.items():
+            if k in self.cls.indexed_attributes:
+                ids = self._matching_ids(k, v)
+                if ids is not None:
+                    break
+        if ids is None:
+            for k, v in attributes.items():
+                ids = self._matching_ids(k, v)
+                if ids is not None:
+                    break
+        if ids is None:
+            ids = list(offsets)
+        for obj_id in ids:
+            if obj_id in offsets:
+                self._load(obj_id)
+
+    def snapshot_items(self) -> list:
+        """ (id, raw JSON string) for entries not loaded yet and
+        (id, object) for the others
+        """
+        with self._lock:
+            items = [(obj_id, self._raw(obj_id).decode())
+                     for obj_id in self.offsets]
+            items.extend(self.loaded.items())
+        return items
+
+    def __getitem__(self, obj_id: str):
+        """ Get an object, loading it if needed
+        """
+        obj = self.loaded.get(obj_id)
+        if obj is not None:
+            return obj
+        if obj_id in self.offsets:
+            return self._load(obj_id)
+        raise KeyError(obj_id)
+
+    def __setitem__(self, obj_id: str, obj):
+        """ Set an object
+        """
+        with self._lock:
+            self.loaded[obj_id] = obj
+            if self._offsets is not None:
+                self._offsets.pop(obj_id, None)
+
+    def __delitem__(self, obj_id: str):
+        """ Delete an object
+        """
+        with self._lock:
+            if obj_id in self.loaded:
+                del self.loaded[obj_id]
+            else:
+                del self.offsets[obj_id]
+
+    def __contains__(self, obj_id) -> bool:
+        """ Check an id without loading the object
+        """
+        return obj_id in self.loaded or obj_id in self.offsets
+
+    def __iter__(self):
+        """ Iterate over all ids
+        """
+        yield from list(self.offsets)
+        yield from list(self.loaded)
+
+    def __len__(self) -> int:
+        """ Number of objects
+        """
+        return len(self.offsets) + len(self.loaded)
 
 
 class Base():
     """ Base class
+    Subclasses can list attributes in `indexed_attributes` to get
+    hash indexes making equality searches on them O(1).
+    Models declare their attributes in `__slots__` so instances
+    don't carry a per-instance __dict__
     """
 
+    __slots__ = ('id', 'created_at', 'updated_at', '_json_cache')
+    indexed_attributes = ()
+
+    def __init_subclass__(cls, **kwargs):
+        """ Register every model in MODELS
+        """
+        super().__init_subclass__(**kwargs)
+        MODELS[cls.__name__] = cls
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
+            self.__class__._reset_indexes()
 
-        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.id = kwargs['id'] if 'id' in kwargs else str(uuid.uuid4())
         if kwargs.get('created_at') is not None:
             self.created_at = datetime.strptime(kwargs.get('created_at'),
                                                 TIMESTAMP_FORMAT)
@@ -44,69 +399,408 @@ class Base():
             return False
         return (self.id == other.id)
 
-    def to_json(self, for_serialization: bool = False) -> dict:
-        """ Convert the object a JSON dictionary
+    @classmethod
+    def _slot_names(cls) -> tuple:
+        """ Slots of the class and its parents, base class first
+        """
+        names = SLOTS.get(cls)
+        if names is None:
+            names = []
+            for klass in reversed(cls.__mro__):
+                slots = klass.__dict__.get('__slots__', ())
+                if isinstance(slots, str):
+                    slots = (slots,)
+                names.extend(name for name in slots
+                             if name not in ('__dict__', '__weakref__',
+                                             '_json_cache'))
+            names = SLOTS[cls] = tuple(names)
+        return names
+
+    def attributes(self) -> dict:
+        """ All attributes of the object, slots first then
+        anything in __dict__ for models without slots
         """
         result = {}
-        for key, value in self.__dict__.items():
-            if not for_serialization and key[0] == '_':
+        for name in self._slot_names():
+            try:
+                result[name] = getattr(self, name)
+            except AttributeError:
                 continue
-            if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
-            else:
-                result[key] = value
+        result.update(getattr(self, '__dict__', {}))
         return result
 
+    def __setattr__(self, name: str, value):
+        """ Set an attribute and drop the cached JSON
+        """
+        object.__setattr__(self, name, value)
+        if name != '_json_cache':
+            object.__setattr__(self, '_json_cache', None)
+
+    def to_json(self, for_serialization: bool = False) -> dict:
+        """ Convert the object a JSON dictionary
+        The result is cached until an attribute of the object
+        changes (save() always does by bumping updated_at)
+        """
+        cache = getattr(self, '_json_cache', None)
+        if cache is None:
+            cache = [None, None]
+            object.__setattr__(self, '_json_cache', cache)
+        result = cache[for_serialization]
+        if result is None:
+            result = {}
+            for key, value in self.attributes().items():
+                if not for_serialization and key[0] == '_':
+                    continue
+                if type(value) is datetime:
+                    result[key] = value.strftime(TIMESTAMP_FORMAT)
+                else:
+                    result[key] = value
+            cache[for_serialization] = result
+        return dict(result)
+
     @classmethod
     def load_from_file(cls):
         """ Load all objects from file
+        then replay the journal written since the last compaction
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
+        if STORAGE_FORMAT == 'sqlite':
+            sqlite_storage.count(cls)
+            return
+        file_path = snapshot_path(s_class)
         DATA[s_class] = {}
-        if not path.exists(file_path):
+        cls._reset_indexes()
+        if path.exists(file_path) and STORAGE_FORMAT == 'binary':
+            with open(file_path, 'rb') as f:
+                for obj_id, attrs in binary_storage.load(f):
+                    DATA[s_class][obj_id] = cls._from_attributes(attrs)
+        elif path.exists(file_path):
+            if LAZY_LOAD:
+                lazy = LazyObjects.open(cls, file_path)
+                if lazy is not None:
+                    DATA[s_class] = lazy
+            if not isinstance(DATA[s_class], LazyObjects):
+                with open(file_path, 'r') as f:
+                    objs_json = json.load(f)
+                    for obj_id, obj_json in objs_json.items():
+                        DATA[s_class][obj_id] = cls(**obj_json)
+
+        entries = 0
+        journal_path = ".db_{}.journal".format(s_class)
+        for j_path in (journal_path + '.1', journal_path):
+            if not path.exists(j_path):
+                continue
+            good = 0
+            with open(j_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn last line of a crashed write
+                        break
+                    if entry['op'] == 'save':
+                        DATA[s_class][entry['id']] = cls(**entry['obj'])
+                    else:
+                        DATA[s_class].pop(entry['id'], None)
+                    entries += 1
+                    good += len(line)
+                torn = f.seek(0, os.SEEK_END) > good
+            if torn:
+                # cut the torn line so new entries are not appended
+                # to it and lost on the next replay
+                with open(j_path, 'r+b') as f:
+                    f.truncate(good)
+                    f.flush()
+                    os.fsync(f.fileno())
+        with class_lock(s_class):
+            journal = JOURNALS.get(s_class)
+            if journal is not None and journal[0] is not None:
+                journal[0].close()
+            JOURNALS[s_class] = [None, entries]
+
+        cls._reset_indexes()
+        objs = DATA[s_class]
+        if isinstance(objs, LazyObjects):
+            objs = objs.loaded
+        for obj in objs.values():
+            obj._index()
+
+    @classmethod
+    def _from_attributes(cls, attrs: dict) -> TypeVar('Base'):
+        """ Build an object from attributes whose timestamps are
+        already datetime objects, skipping strptime
+        """
+        dates = {}
+        for key in ('created_at', 'updated_at'):
+            if type(attrs.get(key)) is datetime:
+                dates[key] = attrs.pop(key)
+        obj = cls(**attrs)
+        for key, value in dates.items():
+            setattr(obj, key, value)
+        return obj
+
+    @classmethod
+    def _reset_indexes(cls):
+        """ Empty the indexes of the class
+        """
+        ORDERS.pop(cls.__name__, None)
+        SORTED_KEYS[cls.__name__] = {}
+        INDEXES[cls.__name__] = ({attr: {} for attr in
+                                  cls.indexed_attributes}, {})
+
+    def _index(self):
+        """ Add the object to the indexes of its class
+        remembering the indexed values so they can be removed later
+        """
+        if not self.indexed_attributes:
             return
+        s_class = self.__class__.__name__
+        indexes, indexed = INDEXES[s_class]
+        values = {}
+        for attr in self.indexed_attributes:
+            value = getattr(self, attr, None)
+            try:
+                bucket = indexes[attr].get(value)
+            except TypeError:
+                continue
+            if bucket is None:
+                bucket = indexes[attr][value] = {}
+                keys = SORTED_KEYS[s_class].get(attr)
+                if keys is not None and type(value) is str:
+                    insort(keys, value)
+            bucket[self.id] = self
+            values[attr] = value
+        indexed[self.id] = values
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    def _unindex(self):
+        """ Remove the object from the indexes of its class
+        """
+        if not self.indexed_attributes:
+            return
+        s_class = self.__class__.__name__
+        indexes, indexed = INDEXES[s_class]
+        for attr, value in indexed.pop(self.id, {}).items():
+            bucket = indexes[attr].get(value)
+            if bucket is not None:
+                bucket.pop(self.id, None)
+                if len(bucket) == 0:
+                    del indexes[attr][value]
+                    keys = SORTED_KEYS[s_class].get(attr)
+                    if keys is not None and type(value) is str:
+                        i = bisect_left(keys, value)
+                        if i < len(keys) and keys[i] == value:
+                            del keys[i]
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
+        Concurrent calls are coalesced: a caller whose changes were
+        already picked up by a write that started after its request
+        returns without writing. With DB_SNAPSHOT_DELAY > 0 the
+        write is deferred by that many seconds so a burst of saves
+        produces a single write
+        """
+        s_class = cls.__name__
+        if STORAGE_FORMAT == 'sqlite':
+            return
+        state = snapshot_state(s_class)
+        with class_lock(s_class):
+            state['requests'] += 1
+            ticket = state['requests']
+            if SNAPSHOT_DELAY > 0:
+                if state['timer'] is None:
+                    state['timer'] = threading.Timer(SNAPSHOT_DELAY,
+                                                     cls._flush_snapshot)
+                    state['timer'].daemon = True
+                    state['timer'].start()
+                return
+        cls._flush_snapshot(ticket)
+
+    @classmethod
+    def _flush_snapshot(cls, ticket: int = None):
+        """ Write the snapshot unless a write started after request
+        @ticket was made
+        """
+        s_class = cls.__name__
+        state = snapshot_state(s_class)
+        with state['lock']:
+            if ticket is not None and state['covered'] >= ticket:
+                return
+            with class_lock(s_class):
+                state['timer'] = None
+                requests = state['requests']
+                objs = snapshot_items(DATA[s_class])
+            write_snapshot(s_class, objs)
+            # only once the file is in place, a failed write must not
+            # let the callers waiting on the lock return
+            state['covered'] = requests
+
+    @classmethod
+    def snapshot_stats(cls) -> dict:
+        """ Snapshot write latency and how many save requests each
+        write covered on average
+        """
+        state = snapshot_state(cls.__name__)
+        writes = state['writes']
+        return {
+            'requests': state['requests'],
+            'writes': writes,
+            'coalesce_ratio': state['requests'] / writes if writes else 0.0,
+            'last_write_ms': state['last_write_ms'],
+            'avg_write_ms': state['total_write_ms'] / writes if writes
+            else 0.0,
+            'last_write_at': state['last_write_at'],
+        }
+
+    @classmethod
+    def _journal(cls, op: str, obj_id: str, obj_json: dict = None):
+        """ Append one save/remove entry to the journal of the class
+        and start a background compaction every JOURNAL_COMPACT_EVERY
+        entries
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        entry = {'op': op, 'id': obj_id}
+        if obj_json is not None:
+            entry['obj'] = obj_json
+        line = json.dumps(entry) + '\n'
+        with class_lock(s_class):
+            journal = JOURNALS.setdefault(s_class, [None, 0])
+            if journal[0] is None:
+                journal[0] = open(".db_{}.journal".format(s_class), 'a')
+            journal[0].write(line)
+            journal[0].flush()
+            journal[1] += 1
+            compact = (journal[1] >= JOURNAL_COMPACT_EVERY and
+                       s_class not in COMPACTING)
+            if compact:
+                COMPACTING.add(s_class)
+        if compact:
+            threading.Thread(target=cls.compact, daemon=True).start()
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def compact(cls):
+        """ Fold the journal of the class into its snapshot file
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        try:
+            with class_lock(s_class):
+                objs = snapshot_items(DATA[s_class])
+                journal = JOURNALS.pop(s_class, None)
+                if journal is not None and journal[0] is not None:
+                    journal[0].close()
+                if path.exists(journal_path):
+                    if path.exists(journal_path + '.1'):
+                        with open(journal_path + '.1', 'a') as old, \
+                                open(journal_path, 'r') as new:
+                            old.write(new.read())
+                        os.remove(journal_path)
+                    else:
+                        os.replace(journal_path, journal_path + '.1')
+
+            # objects changed since the copy are also in the new
+            # journal, whose replay wins over the snapshot
+            with snapshot_state(s_class)['lock']:
+                write_snapshot(s_class, objs)
+            if path.exists(journal_path + '.1'):
+                os.remove(journal_path + '.1')
+        finally:
+            COMPACTING.discard(s_class)
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        if STORAGE_FORMAT == 'sqlite':
+            sqlite_storage.save(self)
+            self._notify('save')
+            return
+        with class_lock(s_class):
+            order = ORDERS.get(s_class)
+            if order is not None and self.id not in DATA[s_class]:
+                insort(order, self.id)
+            DATA[s_class][self.id] = self
+            self._unindex()
+            self._index()
+            if JOURNAL_MODE:
+                self.__class__._journal('save', self.id, self.to_json(True))
+        self._notify('save')
+        if not JOURNAL_MODE:
+            self.__class__.save_to_file()
 
     def remove(self):
         """ Remove object
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
+        if STORAGE_FORMAT == 'sqlite':
+            sqlite_storage.remove(self)
+            self._notify('remove')
+            return
+        with class_lock(s_class):
+            if DATA[s_class].get(self.id) is None:
+                return
             del DATA[s_class][self.id]
+            order = ORDERS.get(s_class)
+            if order is not None:
+                i = bisect_left(order, self.id)
+                if i < len(order) and order[i] == self.id:
+                    del order[i]
+            self._unindex()
+            if JOURNAL_MODE:
+                self.__class__._journal('remove', self.id)
+        self._notify('remove')
+        if not JOURNAL_MODE:
             self.__class__.save_to_file()
 
+    def _notify(self, event: str):
+        """ Run the listeners of @event on the object
+        """
+        for listener in LISTENERS:
+            listener(event, self)
+
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        if STORAGE_FORMAT == 'sqlite':
+            return sqlite_storage.count(cls)
+        return len(DATA.get(s_class, {}))
+
+    @classmethod
+    def count_before(cls, attr: str, value) -> int:
+        """ Count the objects whose @attr is lower than @value
+        """
+        if STORAGE_FORMAT == 'sqlite':
+            if type(value) is datetime:
+                value = value.strftime(TIMESTAMP_FORMAT)
+            return sqlite_storage.count_before(cls, attr, value)
+        return sum(1 for obj in cls.search() if getattr(obj, attr) < value)
+
+    @classmethod
+    def storage_stats(cls) -> dict:
+        """ Size on disk of the store of the class and time of its
+        last snapshot write (epoch seconds, None if never written)
+        """
+        s_class = cls.__name__
+        if STORAGE_FORMAT == 'sqlite':
+            return {'size': sqlite_storage.store_size(),
+                    'last_snapshot': None}
+        file_path = snapshot_path(s_class)
+        journal_path = ".db_{}.journal".format(s_class)
+        size = 0
+        last_snapshot = snapshot_state(s_class)['last_write_at']
+        if path.exists(file_path):
+            size += path.getsize(file_path)
+            if last_snapshot is None:
+                last_snapshot = path.getmtime(file_path)
+        for j_path in (journal_path, journal_path + '.1'):
+            if path.exists(j_path):
+                size += path.getsize(j_path)
+        return {'size': size, 'last_snapshot': last_snapshot}
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -114,18 +808,89 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def search_prefix(cls, attr: str, prefix: str,
+                      attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects whose @attr starts with @prefix and
+        with matching @attributes. On an indexed attribute the
+        matching values are found by bisecting a sorted list of the
+        indexed values, built on first use and kept up to date
+        """
+        s_class = cls.__name__
+        if STORAGE_FORMAT == 'sqlite':
+            return sqlite_storage.search_prefix(cls, attr, prefix,
+                                                attributes)
+        objs = DATA[s_class]
+        if isinstance(objs, LazyObjects):
+            objs.load_prefix(attr, prefix)
+            objs = objs.loaded
+
+        def _search(obj):
+            value = getattr(obj, attr)
+            if type(value) is not str or not value.startswith(prefix):
+                return False
+            for k, v in attributes.items():
+                if (getattr(obj, k) != v):
+                    return False
+            return True
+
+        if attr not in cls.indexed_attributes:
+            return list(filter(_search, objs.values()))
+        with class_lock(s_class):
+            indexes = INDEXES[s_class][0][attr]
+            keys = SORTED_KEYS[s_class].get(attr)
+            if keys is None:
+                keys = SORTED_KEYS[s_class][attr] = sorted(
+                    value for value in indexes if type(value) is str)
+            start = bisect_left(keys, prefix)
+            end = bisect_left(keys, prefix + '\U0010ffff')
+            candidates = []
+            for value in keys[start:end]:
+                candidates.extend(indexes[value].values())
+        return list(filter(_search, candidates))
+
+    @classmethod
+    def page(cls, after: str = None,
+             limit: int = None) -> List[TypeVar('Base')]:
+        """ Return up to @limit objects ordered by id, starting
+        after the id @after. The order comes from a sorted list of
+        ids built once and kept up to date by save/remove
+        """
+        s_class = cls.__name__
+        if STORAGE_FORMAT == 'sqlite':
+            return sqlite_storage.page(cls, after, limit)
+        with class_lock(s_class):
+            order = ORDERS.get(s_class)
+            if order is None:
+                order = ORDERS[s_class] = sorted(DATA[s_class])
+            start = 0 if after is None else bisect_right(order, after)
+            end = len(order) if limit is None else start + limit
+            ids = order[start:end]
+        objs = [DATA[s_class].get(obj_id) for obj_id in ids]
+        return [obj for obj in objs if obj is not None]
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
         s_class = cls.__name__
+        if STORAGE_FORMAT == 'sqlite':
+            return sqlite_storage.get(cls, id)
         return DATA[s_class].get(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+        Uses the smallest matching index when an indexed
+        attribute is part of the search
         """
         s_class = cls.__name__
+        if STORAGE_FORMAT == 'sqlite':
+            return sqlite_storage.search(cls, attributes)
+        objs = DATA[s_class]
+        if isinstance(objs, LazyObjects):
+            objs.load_matching(attributes)
+            objs = objs.loaded
 
         def _search(obj):
             if len(attributes) == 0:
@@ -135,4 +900,18 @@ class Base():
                     return False
             return True
 
-        return list(filter(_search, DATA[s_class].values()))
+        indexes = INDEXES.get(s_class, ({}, {}))[0]
+        candidates = None
+        for k, v in attributes.items():
+            if k not in indexes:
+                continue
+            try:
+                bucket = indexes[k].get(v, {})
+            except TypeError:
+                continue
+            if candidates is None or len(bucket) < len(candidates):
+                candidates = bucket
+        if candidates is not None:
+            objs = candidates
+
+        return list(filter(_search, objs.values()))
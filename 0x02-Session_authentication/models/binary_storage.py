@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+""" Binary storage module
+Compact snapshot format for the models: the attribute names are
+written once in a header and every object is an array of tagged
+values, timestamps are stored as microseconds since the epoch
+"""
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterator, List, Tuple
+import json
+import struct
+
+
+MAGIC = b'HBDB\x01'
+EPOCH = datetime(1970, 1, 1)
+
+NONE, STR, DATETIME, INT, FLOAT, TRUE, FALSE, JSON, ABSENT = range(9)
+
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+I64 = struct.Struct('<q')
+F64 = struct.Struct('<d')
+
+
+def _dump_str(parts: list, value: str):
+    """ Append a length-prefixed utf-8 string to @parts
+    """
+    data = value.encode('utf-8')
+    parts.append(U32.pack(len(data)))
+    parts.append(data)
+
+
+def dump(f: BinaryIO, records: List[Tuple[str, dict]]):
+    """ Write @records, a list of (id, attributes), to @f
+    """
+    keys = {}
+    for _, attrs in records:
+        for key in attrs:
+            keys.setdefault(key, None)
+    keys = list(keys)
+
+    f.write(MAGIC)
+    f.write(U16.pack(len(keys)))
+    for key in keys:
+        data = key.encode('utf-8')
+        f.write(U16.pack(len(data)))
+        f.write(data)
+    f.write(U32.pack(len(records)))
+
+    for obj_id, attrs in records:
+        parts = []
+        _dump_str(parts, obj_id)
+        for key in keys:
+            if key not in attrs:
+                parts.append(bytes((ABSENT,)))
+                continue
+            value = attrs[key]
+            if value is None:
+                parts.append(bytes((NONE,)))
+            elif type(value) is str:
+                parts.append(bytes((STR,)))
+                _dump_str(parts, value)
+            elif type(value) is datetime:
+                delta = value - EPOCH
+                parts.append(bytes((DATETIME,)))
+                parts.append(I64.pack((delta.days * 86400 + delta.seconds) *
+                                      1000000 + delta.microseconds))
+            elif type(value) is bool:
+                parts.append(bytes((TRUE if value else FALSE,)))
+            elif type(value) is int and -2 ** 63 <= value < 2 ** 63:
+                parts.append(bytes((INT,)))
+                parts.append(I64.pack(value))
+            elif type(value) is float:
+                parts.append(bytes((FLOAT,)))
+                parts.append(F64.pack(value))
+            else:
+                parts.append(bytes((JSON,)))
+                _dump_str(parts, json.dumps(value))
+        f.write(b''.join(parts))
+
+
+def load(f: BinaryIO) -> Iterator[Tuple[str, dict]]:
+    """ Read the (id, attributes) records written by dump from @f
+    """
+    data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a binary snapshot")
+    pos = len(MAGIC)
+    n_keys, = U16.unpack_from(data, pos)
+    pos += U16.size
+    keys = []
+    for _ in range(n_keys):
+        size, = U16.unpack_from(data, pos)
+        pos += U16.size
+        keys.append(data[pos:pos + size].decode('utf-8'))
+        pos += size
+    n_records, = U32.unpack_from(data, pos)
+    pos += U32.size
+
+    u32, i64, f64 = U32.unpack_from, I64.unpack_from, F64.unpack_from
+    for _ in range(n_records):
+        size, = u32(data, pos)
+        pos += 4
+        obj_id = data[pos:pos + size].decode('utf-8')
+        pos += size
+        attrs = {}
+        for key in keys:
+            tag = data[pos]
+            pos += 1
+            if tag == STR or tag == JSON:
+                size, = u32(data, pos)
+                pos += 4
+                value = data[pos:pos + size].decode('utf-8')
+                pos += size
+                if tag == JSON:
+                    value = json.loads(value)
+            elif tag == DATETIME:
+                value = EPOCH + timedelta(microseconds=i64(data, pos)[0])
+                pos += 8
+            elif tag == INT:
+                value = i64(data, pos)[0]
+                pos += 8
+            elif tag == FLOAT:
+                value = f64(data, pos)[0]
+                pos += 8
+            elif tag == ABSENT:
+                continue
+            else:
+                value = None if tag == NONE else tag == TRUE
+            attrs[key] = value
+        yield obj_id, attrs
+
+
+def convert(json_path: str, bin_path: str):
+    """ Convert a `.db_<Class>.json` snapshot to the binary format
+    """
+    from models.base import TIMESTAMP_FORMAT
+
+    with open(json_path, 'r') as f:
+        objs_json = json.load(f)
+    records = []
+    for obj_id, attrs in objs_json.items():
+        for key in ('created_at', 'updated_at'):
+            if type(attrs.get(key)) is str:
+                attrs[key] = datetime.strptime(attrs[key], TIMESTAMP_FORMAT)
+        records.append((obj_id, attrs))
+    with open(bin_path, 'wb') as f:
+        dump(f, records)
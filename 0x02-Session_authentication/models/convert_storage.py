@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+""" Convert JSON snapshots to the binary format
+Usage: python3 -m models.convert_storage User UserSession
+"""
+import sys
+from models.binary_storage import convert
+
+
+if __name__ == '__main__':
+    for s_class in sys.argv[1:]:
+        convert(".db_{}.json".format(s_class), ".db_{}.bin".format(s_class))
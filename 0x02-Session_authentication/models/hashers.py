@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+""" Password hashers module
+A hashed password is stored as "$<hasher>$<parameters>$<hash>" so
+several hashers can live side by side and a hash made with an older
+hasher or weaker parameters is upgraded on the next valid login.
+Passwords stored as plain SHA-256 hex digests are still accepted
+"""
+from collections import OrderedDict
+from importlib.util import find_spec
+from os import getenv
+import base64
+import hashlib
+import hmac
+import os
+import threading
+
+
+def _b64(data: bytes) -> str:
+    """ Unpadded base64 of @data
+    """
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(data: str) -> bytes:
+    """ Bytes of the unpadded base64 @data
+    """
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+class PBKDF2Hasher():
+    """ PBKDF2-HMAC-SHA256: $pbkdf2-sha256$<iterations>$<salt>$<hash>
+    """
+
+    name = 'pbkdf2-sha256'
+
+    def __init__(self, iterations: int = 600000):
+        """ Hash new passwords with @iterations
+        """
+        self.iterations = iterations
+
+    def hash(self, pwd: str) -> str:
+        """ Hash of @pwd with a new salt
+        """
+        salt = os.urandom(16)
+        digest = hashlib.pbkdf2_hmac('sha256', pwd.encode(), salt,
+                                     self.iterations)
+        return '${}${}${}${}'.format(self.name, self.iterations,
+                                     _b64(salt), _b64(digest))
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check @pwd against the hash @encoded
+        """
+        iterations, salt, digest = encoded.split('$')[2:]
+        expected = _unb64(digest)
+        return hmac.compare_digest(expected, hashlib.pbkdf2_hmac(
+            'sha256', pwd.encode(), _unb64(salt), int(iterations),
+            len(expected)))
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """ True if @encoded has fewer iterations than new hashes
+        """
+        return int(encoded.split('$')[2]) < self.iterations
+
+
+class ScryptHasher():
+    """ scrypt: $scrypt$<n>,<r>,<p>$<salt>$<hash>
+    """
+
+    name = 'scrypt'
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        """ Hash new passwords with the cost @n, @r and @p
+        """
+        self.params = (n, r, p)
+
+    def _scrypt(self, pwd: str, salt: bytes, params: tuple,
+                dklen: int = 32) -> bytes:
+        """ Raw scrypt of @pwd
+        """
+        n, r, p = params
+        return hashlib.scrypt(pwd.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 2 ** 20, dklen=dklen)
+
+    def hash(self, pwd: str) -> str:
+        """ Hash of @pwd with a new salt
+        """
+        salt = os.urandom(16)
+        return '${}${}${}${}'.format(
+            self.name, ','.join(str(i) for i in self.params), _b64(salt),
+            _b64(self._scrypt(pwd, salt, self.params)))
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check @pwd against the hash @encoded
+        """
+        params, salt, digest = encoded.split('$')[2:]
+        params = tuple(int(i) for i in params.split(','))
+        expected = _unb64(digest)
+        return hmac.compare_digest(expected, self._scrypt(
+            pwd, _unb64(salt), params, len(expected)))
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """ True if @encoded was made with other costs than new hashes
+        """
+        params = tuple(int(i) for i in encoded.split('$')[2].split(','))
+        return params != self.params
+
+
+class BcryptHasher():
+    """ bcrypt, needs the bcrypt package: $bcrypt$<bcrypt hash>
+    """
+
+    name = 'bcrypt'
+
+    def __init__(self, rounds: int = 12):
+        """ Hash new passwords with the work factor @rounds
+        """
+        self.rounds = rounds
+
+    def hash(self, pwd: str) -> str:
+        """ Hash of @pwd with a new salt
+        """
+        import bcrypt
+        hashed = bcrypt.hashpw(pwd.encode(), bcrypt.gensalt(self.rounds))
+        return '${}{}'.format(self.name, hashed.decode('ascii'))
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check @pwd against the hash @encoded
+        """
+        import bcrypt
+        return bcrypt.checkpw(pwd.encode(),
+                              encoded[len(self.name) + 1:].encode('ascii'))
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """ True if @encoded has a lower work factor than new hashes
+        """
+        return int(encoded.split('$')[3]) < self.rounds
+
+
+class SHA256Hasher():
+    """ Unsalted SHA-256 hex digest of the first versions, only
+    verified so the stored passwords are upgraded on login
+    """
+
+    name = 'sha256'
+
+    def hash(self, pwd: str) -> str:
+        """ Hex digest of @pwd
+        """
+        return hashlib.sha256(pwd.encode()).hexdigest().lower()
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check @pwd against the digest @encoded
+        """
+        return hmac.compare_digest(self.hash(pwd), encoded)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """ Always upgraded
+        """
+        return True
+
+
+HASHERS = {
+    PBKDF2Hasher.name: PBKDF2Hasher(
+        int(getenv('PBKDF2_ITERATIONS', '600000'))),
+    ScryptHasher.name: ScryptHasher(int(getenv('SCRYPT_N', str(2 ** 14)))),
+    BcryptHasher.name: BcryptHasher(int(getenv('BCRYPT_ROUNDS', '12'))),
+}
+LEGACY = SHA256Hasher()
+DEFAULT = getenv('PASSWORD_HASHER', PBKDF2Hasher.name)
+if DEFAULT not in HASHERS:
+    raise ValueError("unknown PASSWORD_HASHER {!r}, use one of {}".format(
+        DEFAULT, ', '.join(HASHERS)))
+if DEFAULT == BcryptHasher.name and find_spec('bcrypt') is None:
+    raise ImportError("PASSWORD_HASHER=bcrypt needs the bcrypt package")
+
+VERIFY_CACHE_SIZE = int(getenv('PASSWORD_CACHE_SIZE', '1024'))
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+_verified_key = os.urandom(32)
+
+
+def hasher_of(encoded: str):
+    """ Hasher that made @encoded
+    """
+    if not encoded.startswith('$'):
+        return LEGACY
+    return HASHERS[encoded.split('$', 2)[1]]
+
+
+def make_password(pwd: str) -> str:
+    """ Hash @pwd with the default hasher
+    """
+    return HASHERS[DEFAULT].hash(pwd)
+
+
+def check_password(pwd: str, encoded: str) -> bool:
+    """ Check @pwd against @encoded. Valid pairs are remembered as a
+    keyed hash in a bounded LRU, so a client sending the same
+    credentials on every request pays for the slow hash once
+    """
+    key = hmac.new(_verified_key, '{}\0{}'.format(encoded, pwd).encode(),
+                   hashlib.sha256).digest()
+    with _verified_lock:
+        if key in _verified:
+            _verified.move_to_end(key)
+            return True
+    try:
+        valid = hasher_of(encoded).verify(pwd, encoded)
+    except (KeyError, ValueError, ImportError):
+        # unknown or malformed hash, or bcrypt hash without bcrypt
+        return False
+    if valid and VERIFY_CACHE_SIZE > 0:
+        with _verified_lock:
+            _verified[key] = True
+            if len(_verified) > VERIFY_CACHE_SIZE:
+                _verified.popitem(last=False)
+    return valid
+
+
+def needs_rehash(encoded: str) -> bool:
+    """ True if @encoded should be replaced by a hash of the default
+    hasher with its current parameters
+    """
+    hasher = hasher_of(encoded)
+    if hasher is not HASHERS[DEFAULT]:
+        return True
+    return hasher.needs_rehash(encoded)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+""" SQLite storage module
+Keeps the objects of every model in one SQLite database in WAL
+mode so several worker processes share a single consistent store.
+Each model has its own table: the id, the JSON of the object and
+one indexed column per attribute in `indexed_attributes`
+"""
+from os import getenv, path
+from typing import List, TypeVar
+import json
+import sqlite3
+import threading
+
+
+DB_PATH = getenv('DB_SQLITE_PATH', '.db.sqlite3')
+_local = threading.local()
+_tables = set()
+
+
+def connection() -> sqlite3.Connection:
+    """ Connection of the current thread
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        # lets the implicit delete of INSERT OR REPLACE fire the
+        # triggers keeping the row counts
+        conn.execute('PRAGMA recursive_triggers=ON')
+        _local.conn = conn
+    return conn
+
+
+def _table(cls) -> str:
+    """ Create the table of @cls if needed and return its name
+    """
+    name = cls.__name__
+    if name not in _tables:
+        columns = ''.join(', "{}"'.format(attr)
+                          for attr in cls.indexed_attributes)
+        conn = connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS "{}" '
+                     '(id TEXT PRIMARY KEY, data TEXT NOT NULL{})'
+                     .format(name, columns))
+        for attr in cls.indexed_attributes:
+            conn.execute('CREATE INDEX IF NOT EXISTS "ix_{0}_{1}" '
+                         'ON "{0}" ("{1}")'.format(name, attr))
+        conn.execute('CREATE TABLE IF NOT EXISTS _counts '
+                     '(name TEXT PRIMARY KEY, n INTEGER NOT NULL)')
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT OR IGNORE INTO _counts VALUES '
+                         '(?, (SELECT COUNT(*) FROM "{}"))'.format(name),
+                         (name,))
+            conn.execute('CREATE TRIGGER IF NOT EXISTS "count_ins_{0}" '
+                         'AFTER INSERT ON "{0}" BEGIN UPDATE _counts '
+                         'SET n = n + 1 WHERE name = \'{0}\'; END'
+                         .format(name))
+            conn.execute('CREATE TRIGGER IF NOT EXISTS "count_del_{0}" '
+                         'AFTER DELETE ON "{0}" BEGIN UPDATE _counts '
+                         'SET n = n - 1 WHERE name = \'{0}\'; END'
+                         .format(name))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        _tables.add(name)
+    return name
+
+
+def _build(cls, data: str) -> TypeVar('Base'):
+    """ Build an object of @cls from its stored JSON
+    """
+    return cls(**json.loads(data))
+
+
+def save(obj: TypeVar('Base')):
+    """ Insert or replace @obj
+    """
+    cls = obj.__class__
+    table = _table(cls)
+    attrs = cls.indexed_attributes
+    values = [obj.id, json.dumps(obj.to_json(True))]
+    values.extend(getattr(obj, attr, None) for attr in attrs)
+    connection().execute(
+        'INSERT OR REPLACE INTO "{}" (id, data{}) VALUES (?, ?{})'.format(
+            table, ''.join(', "{}"'.format(attr) for attr in attrs),
+            ', ?' * len(attrs)), values)
+
+
+def remove(obj: TypeVar('Base')):
+    """ Delete @obj
+    """
+    table = _table(obj.__class__)
+    connection().execute('DELETE FROM "{}" WHERE id = ?'.format(table),
+                         (obj.id,))
+
+
+def count(cls) -> int:
+    """ Number of objects of @cls, kept by triggers so it is
+    read in constant time
+    """
+    table = _table(cls)
+    return connection().execute(
+        'SELECT n FROM _counts WHERE name = ?', (table,)).fetchone()[0]
+
+
+def count_before(cls, attr: str, value) -> int:
+    """ Number of objects of @cls whose stored @attr sorts before
+    @value, a scan of the table done by SQLite
+    """
+    table = _table(cls)
+    return connection().execute(
+        'SELECT COUNT(*) FROM "{}" WHERE json_extract(data, ?) < ?'.format(
+            table), ('$."{}"'.format(attr), value)).fetchone()[0]
+
+
+def store_size() -> int:
+    """ Size in bytes of the database and its WAL
+    """
+    size = 0
+    for file_path in (DB_PATH, DB_PATH + '-wal'):
+        if path.exists(file_path):
+            size += path.getsize(file_path)
+    return size
+
+
+def get(cls, obj_id: str) -> TypeVar('Base'):
+    """ Object of @cls with id @obj_id, None if there is none
+    """
+    table = _table(cls)
+    row = connection().execute(
+        'SELECT data FROM "{}" WHERE id = ?'.format(table),
+        (obj_id,)).fetchone()
+    return None if row is None else _build(cls, row[0])
+
+
+def search(cls, attributes: dict) -> List[TypeVar('Base')]:
+    """ Objects of @cls with matching attributes. Equality on the
+    id and indexed attributes is done by SQLite, the other
+    attributes are checked on the built objects
+    """
+    table = _table(cls)
+    where = []
+    values = []
+    rest = {}
+    for k, v in attributes.items():
+        if (k == 'id' or k in cls.indexed_attributes) and \
+                (v is None or type(v) in (str, int, float)):
+            where.append('"{}" IS ?'.format(k))
+            values.append(v)
+        else:
+            rest[k] = v
+    sql = 'SELECT data FROM "{}"'.format(table)
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    objs = [_build(cls, row[0])
+            for row in connection().execute(sql, values)]
+    if not rest:
+        return objs
+    return [obj for obj in objs
+            if all(getattr(obj, k) == v for k, v in rest.items())]
+
+
+def search_prefix(cls, attr: str, prefix: str,
+                  attributes: dict) -> List[TypeVar('Base')]:
+    """ Objects of @cls whose @attr starts with @prefix and with
+    matching @attributes. On an indexed attribute the prefix is a
+    range scan of its index
+    """
+    if attr not in cls.indexed_attributes:
+        return [obj for obj in search(cls, attributes)
+                if type(getattr(obj, attr)) is str and
+                getattr(obj, attr).startswith(prefix)]
+    table = _table(cls)
+    sql = 'SELECT data FROM "{0}" WHERE "{1}" >= ? AND "{1}" < ?'.format(
+        table, attr)
+    objs = [_build(cls, row[0]) for row in connection().execute(
+        sql, (prefix, prefix + '\U0010ffff'))]
+    return [obj for obj in objs
+            if getattr(obj, attr).startswith(prefix) and
+            all(getattr(obj, k) == v for k, v in attributes.items())]
+
+
+def page(cls, after: str = None, limit: int = None) -> List[TypeVar('Base')]:
+    """ Up to @limit objects of @cls ordered by id, after the id @after
+    """
+    table = _table(cls)
+    sql = 'SELECT data FROM "{}"'.format(table)
+    values = []
+    if after is not None:
+        sql += ' WHERE id > ?'
+        values.append(after)
+    sql += ' ORDER BY id'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        values.append(limit)
+    return [_build(cls, row[0])
+            for row in connection().execute(sql, values)]
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+""" Tests of the password hashers
+"""
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from models import hashers  # noqa: E402
+
+
+def test_legacy_sha256():
+    """ Old SHA-256 digests are accepted and need a rehash
+    """
+    encoded = hashlib.sha256(b'pwd').hexdigest()
+    assert hashers.check_password('pwd', encoded)
+    assert not hashers.check_password('other', encoded)
+    assert hashers.needs_rehash(encoded)
+
+
+def test_bcrypt_missing(monkeypatch):
+    """ A bcrypt hash without the bcrypt package is a failed check,
+    not an error
+    """
+    monkeypatch.setitem(sys.modules, 'bcrypt', None)
+    assert not hashers.check_password(
+        'pwd', '$bcrypt$2b$12$' + 'a' * 53)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+""" Tests of the in-memory session store
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from api.v1.auth.session_store import Session, SessionStore  # noqa: E402
+
+
+def test_expire_before():
+    """ Expired sessions are removed once and counted
+    """
+    store = SessionStore(4)
+    old = [store.create('user') for _ in range(100)]
+    while time.time() <= store.get(old[-1]).created_at:
+        pass
+    cutoff = time.time()
+    while time.time() <= cutoff:
+        pass
+    new = store.create('user')
+    assert store.expire_before(cutoff) == 100
+    assert len(store) == 1
+    assert store.get(old[0]) is None
+    assert store.get(new).user_id == 'user'
+    assert store.expire_before(cutoff) == 100
+    store.pop(new, expired=True)
+    assert store.expire_before(cutoff) == 101
+    assert len(store) == 0
+
+
+def test_expire_before_overlap():
+    """ A call waiting on a shard lock works on the shard dict that
+    an overlapping call left, not on the one it saw before
+    """
+    store = SessionStore(1)
+    for _ in range(10):
+        store.create('user')
+    last = max(s.created_at for s in store._shards[0].values())
+    while time.time() <= last:
+        pass
+    cutoff = time.time()
+    while time.time() <= cutoff:
+        pass
+    counts = []
+    with store._locks[0]:
+        waiting = threading.Thread(
+            target=lambda: counts.append(store.expire_before(cutoff)))
+        waiting.start()
+        time.sleep(0.05)
+        # what an overlapping call and a create do meanwhile
+        store._shards[0] = dict(store._shards[0])
+        new = 'new-session'
+        store._shards[0][new] = Session('user', time.time())
+    waiting.join()
+    assert counts == [10]
+    assert store.get(new).user_id == 'user'
+    assert len(store) == 1
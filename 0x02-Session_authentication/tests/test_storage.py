@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+""" Crash and restart tests of the file storage
+Every step runs in its own interpreter since the storage settings
+are read from the environment at import time
+"""
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(tmp_path, code: str, **env: str) -> str:
+    """ Run @code in @tmp_path with the settings @env, return stdout
+    """
+    environ = dict(os.environ, PYTHONPATH=ROOT, **env)
+    return subprocess.run(
+        [sys.executable, '-c', 'from models.user import User\n' + code],
+        cwd=str(tmp_path), env=environ, check=True,
+        stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+
+SAVE_3 = '''
+User.load_from_file()
+for i in range(3):
+    u = User()
+    u.email = 'user{}@example.com'.format(i)
+    u.save()
+print(User.count())
+'''
+COUNT = '''
+User.load_from_file()
+print(User.count())
+'''
+
+
+def test_journal_torn_line(tmp_path):
+    """ Saves made after a torn journal line survive a restart
+    """
+    env = {'DB_JOURNAL': '1'}
+    assert run(tmp_path, SAVE_3, **env) == '3\n'
+    with open(str(tmp_path / '.db_User.journal'), 'a') as f:
+        f.write('{"op": "save", "id": "torn", "obj": {"ema')
+    assert run(tmp_path, SAVE_3, **env) == '6\n'
+    assert run(tmp_path, COUNT, **env) == '6\n'
+
+
+def test_failed_snapshot_not_covered(tmp_path):
+    """ A snapshot write that fails leaves no temp file and does not
+    mark the save requests as written
+    """
+    out = run(tmp_path, '''
+import os
+from models.base import snapshot_state
+User.load_from_file()
+os.mkdir('.db_User.json')
+try:
+    User().save()
+except OSError:
+    print('failed')
+state = snapshot_state('User')
+print(state['covered'] < state['requests'])
+print(os.path.exists('.db_User.json.tmp'))
+''')
+    assert out == 'failed\nTrue\nFalse\n'
+
+
+def test_deferred_snapshot_flushed_at_exit(tmp_path):
+    """ Saves still waiting for DB_SNAPSHOT_DELAY are written when
+    the process exits
+    """
+    env = {'DB_SNAPSHOT_DELAY': '5'}
+    assert run(tmp_path, SAVE_3, **env) == '3\n'
+    assert run(tmp_path, COUNT, **env) == '3\n'
+
+
+def test_sqlite_session_shared_by_workers(tmp_path):
+    """ A session created by one worker is valid in another one
+    """
+    env = {'DB_FORMAT': 'sqlite', 'AUTH_TYPE': 'session_db_auth',
+           'SESSION_NAME': '_my_session_id', 'SESSION_DURATION': '60'}
+    session_id = run(tmp_path, '''
+u = User()
+u.email = 'bob@example.com'
+u.save()
+from api.v1.app import auth
+print(auth.create_session(u.id))
+''', **env).strip()
+    out = run(tmp_path, '''
+from api.v1.app import app
+response = app.test_client(use_cookies=False).get(
+    '/api/v1/users/me', headers={{'Cookie': '_my_session_id={}'}})
+print(response.get_json()['email'])
+'''.format(session_id), **env)
+    assert out == 'bob@example.com\n'
+
+
+def test_sqlite_session_counts_shared_by_workers(tmp_path):
+    """ Every worker counts the sessions of the shared store
+    """
+    env = {'DB_FORMAT': 'sqlite', 'AUTH_TYPE': 'session_db_auth',
+           'SESSION_NAME': '_my_session_id', 'SESSION_DURATION': '60'}
+    create = '''
+from api.v1.app import auth
+from models.user_session import UserSession
+auth.create_session('u1')
+UserSession(user_id='u2', session_id='old',
+            created_at='2000-01-01T00:00:00').save()
+'''
+    run(tmp_path, create, **env)
+    run(tmp_path, create, **env)
+    out = run(tmp_path, '''
+from api.v1.app import auth
+print(auth.session_counts())
+''', **env)
+    assert out == '(2, 2)\n'
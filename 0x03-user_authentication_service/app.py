@@ -3,7 +3,7 @@
 """
 
 from flask import Flask, jsonify, request, abort, make_response, redirect
-from auth import Auth
+from auth import Auth, HashPoolBusy
 
 app = Flask(__name__)
 AUTH = Auth()
@@ -25,6 +25,8 @@ def users():
         return jsonify({"email": email, "message": "user created"})
     except ValueError:
         return jsonify({"message": "email already registered"})
+    except HashPoolBusy:
+        abort(503)
 
 
 @app.route('/sessions', methods=['POST'])
@@ -32,8 +34,11 @@ def login():
     """create a user session using the post data"""
     email = request.values.get('email')
     password = request.values.get('password')
-    if AUTH.valid_login(email, password) is False:
-        abort(401)
+    try:
+        if AUTH.valid_login(email, password) is False:
+            abort(401)
+    except HashPoolBusy:
+        abort(503)
     sess_id = AUTH.create_session(email)
     if sess_id:
         resp = make_response(jsonify({"email": email, "message": "logged in"}))
@@ -90,6 +95,8 @@ def update_password():
         return jsonify({"email": email, "message": "Password updated"}), 200
     except ValueError:
         abort(403)
+    except HashPoolBusy:
+        abort(503)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """Auth module
 """
+from concurrent.futures import ThreadPoolExecutor
 from db import DB
 import bcrypt
+import os
 from sqlalchemy.orm.exc import NoResultFound
-from typing import TypeVar
+from threading import BoundedSemaphore
+from typing import Callable, TypeVar
 from uuid import uuid4
 
 
@@ -20,6 +23,41 @@ def _generate_uuid() -> str:
     return str(uuid4())
 
 
+class HashPoolBusy(Exception):
+    """Raised when the hashing pool has no room for more work"""
+
+
+class HashPool:
+    """Bounded pool of threads running bcrypt off the request thread.
+    bcrypt releases the GIL so hashes run in parallel. At most
+    @workers + @max_pending jobs are accepted at once, after that
+    run() fails fast with HashPoolBusy instead of queueing"""
+
+    def __init__(self, workers: int = None, max_pending: int = None):
+        """Initialize the pool from AUTH_HASH_WORKERS and
+        AUTH_HASH_MAX_PENDING if not given"""
+        if workers is None:
+            workers = int(os.getenv('AUTH_HASH_WORKERS',
+                                    str(os.cpu_count() or 1)))
+        if max_pending is None:
+            max_pending = int(os.getenv('AUTH_HASH_MAX_PENDING',
+                                        str(workers * 4)))
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = BoundedSemaphore(workers + max_pending)
+
+    def run(self, fn: Callable, *args):
+        """Run fn(*args) in the pool and wait for its result"""
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future.result()
+
+
 class Auth:
     """Auth class to interact with the authentication database.
     """
@@ -27,6 +65,7 @@ class Auth:
     def __init__(self):
         """Initialize class"""
         self._db = DB()
+        self._hash_pool = HashPool()
 
     def register_user(self, email: str, password: str) -> TypeVar('User'):
         """register a user with given email"""
@@ -34,7 +73,7 @@ class Auth:
             self._db.find_user_by(email=email)
             raise ValueError('User {} already exists'.format(email))
         except NoResultFound:
-            hashed = _hash_password(password)
+            hashed = self._hash_pool.run(_hash_password, password)
             return self._db.add_user(email, hashed)
 
     def valid_login(self, email: str, password: str) -> bool:
@@ -42,7 +81,8 @@ class Auth:
         try:
             user = self._db.find_user_by(email=email)
             pss_bytes = bytes(password, encoding='utf-8')
-            if bcrypt.checkpw(pss_bytes, user.hashed_password):
+            if self._hash_pool.run(bcrypt.checkpw, pss_bytes,
+                                   user.hashed_password):
                 return True
             else:
                 return False
@@ -91,7 +131,7 @@ class Auth:
         """update a password for account associated with the reset token"""
         try:
             user = self._db.find_user_by(reset_token=reset_token)
-            hashed_pwd = _hash_password(password)
+            hashed_pwd = self._hash_pool.run(_hash_password, password)
             self._db.update_user(user.id, **{'hashed_password': hashed_pwd})
             self._db.update_user(user.id, **{'reset_token': None})
         except NoResultFound:
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Measure logins/sec and the fail-fast 503 rate of the bcrypt
+HashPool for several pool sizes
+Usage: ./bench_logins.py [clients] [seconds] [workers ...]
+"""
+from auth import HashPool, HashPoolBusy, _hash_password
+import bcrypt
+import os
+import sys
+import threading
+import time
+
+RETRY_AFTER = 0.1
+
+
+def load(workers: int, clients: int, seconds: float) -> dict:
+    """Check one password from @clients threads for @seconds through
+    a pool of @workers threads, counting served and rejected logins"""
+    pool = HashPool(workers)
+    hashed = _hash_password('b4l0u')
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    end = time.perf_counter() + seconds
+
+    def client():
+        """Log in until the end of the run"""
+        while time.perf_counter() < end:
+            try:
+                pool.run(bcrypt.checkpw, b'b4l0u', hashed)
+                key = 'ok'
+            except HashPoolBusy:
+                key = 'busy'
+                # a client retrying after its 503
+                time.sleep(RETRY_AFTER)
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = counts['ok'] + counts['busy']
+    return {'logins/s': counts['ok'] / seconds,
+            '503/s': counts['busy'] / seconds,
+            '503 rate': counts['busy'] / total if total else 0.0}
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    sizes = [int(w) for w in sys.argv[3:]] or [1, 2, 4]
+    print("{} clients, {} cpu(s), AUTH_HASH_MAX_PENDING={}".format(
+        clients, os.cpu_count(),
+        os.getenv('AUTH_HASH_MAX_PENDING', 'workers * 4')))
+    for workers in sizes:
+        result = load(workers, clients, seconds)
+        print("workers={}: {:.1f} logins/s, {:.1f} 503/s ({:.1%})".format(
+            workers, result['logins/s'], result['503/s'],
+            result['503 rate']))